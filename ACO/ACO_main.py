@@ -1,28 +1,107 @@
-from Solver import Solver
+from Board import Board
+from ExactSolver import ExactSolver
+from Pheromone import PheromoneMatrix
+from Solver import Ant, Solver
+from VectorizedSolver import VectorizedSolver
 from argparse import ArgumentParser
-from utils import get_boards_from_file
+from utils import create_board_from_str
+import os
+import sys
+
+# corpus.py, profiling.py, hyperparams.py and solution_cache.py live in the repository root, one level above this script.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from corpus import find_puzzle_file, read_puzzle
+from profiling import profiled
+from solution_cache import SolutionCache
+from hyperparams import load_hyperparams
+
+PROFILE_TARGETS = [
+    (Ant, "step", "_select_value"),
+    (Board, "propagate_constraints", "propagate_constraints_all", "propagate_hidden_singles", "copy", "restore"),
+    (Solver, "_initialize_ants", "_update_pheromone_matrix"),
+    (PheromoneMatrix, "get_cell", "local_update", "local_update_many", "global_update"),
+    (VectorizedSolver, "_step", "_select_values", "_propagate_constraints", "_update_pheromone_matrix"),
+]
+# Argument set by every solver parameter of a tuning.py profile.
+HYPERPARAM_ARGUMENTS = {
+    "ants_number": "antsNum",
+    "global_pher_update": "globalPherUpdate",
+    "local_pher_update": "localPherUpdate",
+    "greedines": "greediness",
+    "evaporation_parameter": "evaporationParam",
+    "max_iterations": "iterations",
+}
 
 
 def main():
     parser = ArgumentParser(description="Sudoku Solver with Hyperparameters")
-    parser.add_argument("difficulty", help="Difficulty of the sudoku board")
+    parser.add_argument("difficulty", help="Difficulty of the sudoku board, or a board file (text or packed corpus)")
     parser.add_argument("-antsNum", "--antsNum", type=int, default=100, help="Number of ants")
     parser.add_argument("-gloPherUp", "--globalPherUpdate", type=float, default=0.9, help="Global pheromone update")
     parser.add_argument("-locPherUp", "--localPherUpdate", type=float, default=0.1, help="Local pheromone update")
     parser.add_argument("-greed", "--greediness", type=float, default=0.9, help="Greediness")
     parser.add_argument("-evapPar", "--evaporationParam", type=float, default=0.005, help="Best value evaporation parameter")
     parser.add_argument("-iter", "--iterations", type=int, default=200, help="Number of iterations")
+    parser.add_argument("-timeLimit", "--timeLimitMs", type=float, default=None, help="Stop with the best board so far after this many milliseconds")
     parser.add_argument("-nboard", "--boardNumber", type=int, default=0, help="Number of board")
+    parser.add_argument("-hidden", "--hiddenSingles", action="store_true", help="Fix hidden singles after every ant step")
+    parser.add_argument("-vec", "--vectorized", action="store_true", help="Step all ants at once with the vectorized solver")
+    parser.add_argument("-workers", "--workers", type=int, default=1, help="Number of colonies solving in parallel processes")
+    parser.add_argument("-exch", "--exchangeInterval", type=int, default=10, help="Iterations between exchanges of the colonies' best board and pheromone")
+    parser.add_argument("-seed", "--seed", type=int, default=None, help="Seed of the solver's random streams")
+    parser.add_argument("-prepass", "--prepass", action="store_true", help="Skip the ants if the exact solver finishes within 1 ms")
+    parser.add_argument("-pherIn", "--pheromoneIn", default=None, help="Start from a pheromone matrix saved as .npy")
+    parser.add_argument("-pherOut", "--pheromoneOut", default=None, help="Save the final pheromone matrix as .npy")
+    parser.add_argument("-cache", "--cache", default=None, help="SQLite solution cache file, answers boards equivalent to solved ones")
+    parser.add_argument("-profile", "--profile", action="store_true", help="Print calls and time of the solver's phases")
+    parser.add_argument("-profStats", "--profileStats", default=None, help="Run under cProfile and save its statistics to this file")
+    parser.add_argument(
+        "-hyper", "--hyperparams", default=None, help="Profiles file written by tuning.py, the difficulty's profile replaces the defaults"
+    )
 
+    args, _ = parser.parse_known_args()
+    if args.hyperparams:
+        profile = load_hyperparams(args.hyperparams, "vectorized" if args.vectorized else "aco", args.difficulty)
+        parser.set_defaults(**{HYPERPARAM_ARGUMENTS[name]: value for name, value in profile.items()})
     args = parser.parse_args()
-    try:
-        board = get_boards_from_file(f"../resources/{args.difficulty}.txt")[args.boardNumber]
-    except FileNotFoundError:
-        board = get_boards_from_file(f"./resources/{args.difficulty}.txt")[args.boardNumber]
+    if args.vectorized and args.workers > 1:
+        parser.error("--workers is only supported by the scalar solver")
+    puzzle = read_puzzle(find_puzzle_file(args.difficulty), args.boardNumber)
+    board = create_board_from_str(puzzle)
     print(board.print())
     print("Solving...")
-    solver = Solver(args.antsNum, args.globalPherUpdate, args.localPherUpdate, args.greediness, args.evaporationParam, args.iterations)
-    returned = solver.solve(board, print_step=True)
+    cache = SolutionCache(args.cache) if args.cache else None
+    if cache is not None:
+        cached = cache.get(puzzle)
+        if cached is not None:
+            print("Found in the solution cache")
+            print(create_board_from_str(cached).print())
+            return
+    if args.prepass:
+        score, solution, _, _, _ = ExactSolver(time_limit_ms=1).solve(board)
+        if score == 0:
+            print(solution.print())
+            return
+    initial_pheromone = PheromoneMatrix.load(args.pheromoneIn, size=board.layout.size) if args.pheromoneIn else None
+    if args.vectorized:
+        solver = VectorizedSolver(
+            args.antsNum, args.globalPherUpdate, args.localPherUpdate, args.greediness, args.evaporationParam, args.iterations,
+            initial_pheromone=initial_pheromone, time_limit_ms=args.timeLimitMs, seed=args.seed,
+        )
+    else:
+        solver = Solver(
+            args.antsNum, args.globalPherUpdate, args.localPherUpdate, args.greediness, args.evaporationParam, args.iterations,
+            hidden_singles=args.hiddenSingles, initial_pheromone=initial_pheromone, time_limit_ms=args.timeLimitMs, seed=args.seed,
+        )
+    with profiled(PROFILE_TARGETS, args.profile, args.profileStats):
+        if args.workers > 1:
+            returned = solver.solve_parallel(board, args.workers, args.exchangeInterval, args.seed, print_step=True)
+        else:
+            returned = solver.solve(board, print_step=True)
+    if args.pheromoneOut:
+        solver.global_pher_matrix.save(args.pheromoneOut)
+    if cache is not None and returned[0] == 0:
+        cache.put(puzzle, returned[1].to_str())
     print(returned[1].print())
 
 
@@ -1,130 +1,254 @@
 import math
-
-BOARD_SIZE = 9
+from array import array
+from functools import lru_cache
+
+# Values above 9 are written as letters, so a cell is still one character up to 35x35 boards.
+VALUE_CHARS = "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+# Up to this size the candidates and their count are looked up in tables indexed by the mask.
+MAX_TABLE_SIZE = 16
+
+
+class _MaskSizes:
+    # Stands in for the MASK_SIZES table on boards too large to tabulate every mask.
+    def __getitem__(self, mask: int) -> int:
+        return mask.bit_count()
+
+
+class _MaskValues:
+    # Stands in for the MASK_VALUES table on boards too large to tabulate every mask.
+    def __getitem__(self, mask: int) -> tuple[int, ...]:
+        return tuple(value + 1 for value in range(mask.bit_length()) if mask >> value & 1)
+
+
+class Layout:
+    """Size dependent tables of an N²xN² board, built once per size and shared by all its boards.
+
+    Cell candidates are stored as bitmasks: bit (value - 1) is set when the value is still possible.
+    Peers are ordered row, column, square, so the propagation order matches the row/column/square scan.
+    """
+
+    def __init__(self, size: int) -> None:
+        square_size = math.isqrt(size)
+        if square_size < 1 or square_size * square_size != size or size > len(VALUE_CHARS):
+            raise ValueError(f"Board size {size} is not a square number between 1 and {len(VALUE_CHARS)}")
+        self.size = size
+        self.square_size = square_size
+        self.cells_count = size * size
+        self.full_mask = (1 << size) - 1
+        # array("H") holds the masks of boards up to 16x16, larger boards need 32 bits per cell.
+        self.typecode = "H" if size <= 16 else "L"
+        if size <= MAX_TABLE_SIZE:
+            self.mask_values = tuple(
+                tuple(value for value in range(1, size + 1) if mask >> (value - 1) & 1) for mask in range(self.full_mask + 1)
+            )
+            self.mask_sizes = tuple(len(values) for values in self.mask_values)
+        else:
+            self.mask_values = _MaskValues()
+            self.mask_sizes = _MaskSizes()
+        self.peers = self._build_peers()
+        self.units = self._build_units()
+
+    def __reduce__(self):
+        # Boards are sent to worker processes, the tables are rebuilt there instead of pickled.
+        return get_layout, (self.size,)
+
+    def _build_peers(self) -> tuple[tuple[int, ...], ...]:
+        size, square_size = self.size, self.square_size
+        peers = []
+        for index in range(self.cells_count):
+            row, column = divmod(index, size)
+            row_peers = [row * size + other for other in range(size) if other != column]
+            column_peers = [other * size + column for other in range(size) if other != row]
+            square_start_row = row // square_size * square_size
+            square_start_column = column // square_size * square_size
+            square_peers = [
+                square_row * size + square_column
+                for square_row in range(square_start_row, square_start_row + square_size)
+                for square_column in range(square_start_column, square_start_column + square_size)
+                if square_row != row and square_column != column
+            ]
+            peers.append(tuple(row_peers + column_peers + square_peers))
+        return tuple(peers)
+
+    def _build_units(self) -> tuple[tuple[int, ...], ...]:
+        size, square_size = self.size, self.square_size
+        rows = [tuple(row * size + column for column in range(size)) for row in range(size)]
+        columns = [tuple(row * size + column for row in range(size)) for column in range(size)]
+        squares = [
+            tuple(
+                (square_row + row) * size + square_column + column
+                for row in range(square_size)
+                for column in range(square_size)
+            )
+            for square_row in range(0, size, square_size)
+            for square_column in range(0, size, square_size)
+        ]
+        return tuple(rows + columns + squares)
+
+
+@lru_cache(maxsize=None)
+def get_layout(size: int) -> Layout:
+    return Layout(size)
+
+
+# Tables of the classic 9x9 board, used by the engines that only support that size.
+LAYOUT = get_layout(9)
+BOARD_SIZE = LAYOUT.size
+SQUARE_SIZE = LAYOUT.square_size
+CELLS_COUNT = LAYOUT.cells_count
+FULL_MASK = LAYOUT.full_mask
+MASK_VALUES = LAYOUT.mask_values
+MASK_SIZES = LAYOUT.mask_sizes
+PEERS = LAYOUT.peers
+UNITS = LAYOUT.units
 
 
 class Board:
     def __init__(self, board: list[list[int]]):
-        positionsible_values_def = [i for i in range(1, BOARD_SIZE + 1)]
-        self.board = [[positionsible_values_def.copy() for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
-        for row in range(BOARD_SIZE):
-            for column in range(BOARD_SIZE):
+        layout = self.layout = get_layout(len(board))
+        self.cells = array(layout.typecode, [layout.full_mask]) * layout.cells_count
+        for row in range(layout.size):
+            for column in range(layout.size):
                 if board[row][column] != 0:
                     self.set_cell_fixed_value((row, column), board[row][column])
                     self.propagate_constraints((row, column))
 
+    @classmethod
+    def from_masks(cls, masks: list[int]) -> "Board":
+        board = cls.__new__(cls)
+        board.layout = get_layout(math.isqrt(len(masks)))
+        board.cells = array(board.layout.typecode, masks)
+        return board
+
+    def get_masks(self) -> list[int]:
+        return self.cells.tolist()
+
+    def copy(self) -> "Board":
+        board = type(self).__new__(type(self))
+        board.layout = self.layout
+        board.cells = self.cells[:]
+        return board
+
+    def restore(self, snapshot: "Board") -> None:
+        self.cells[:] = snapshot.cells
+
     def is_cell_fixed(self, position: tuple[int, int]) -> bool:
-        return len(self.get_cell(position)) == 1
+        layout = self.layout
+        return layout.mask_sizes[self.cells[position[0] * layout.size + position[1]]] == 1
 
     def is_cell_failed(self, position: tuple[int, int]) -> bool:
-        return len(self.get_cell(position)) == 0
+        return self.cells[position[0] * self.layout.size + position[1]] == 0
 
-    def get_cell(self, position: tuple[int, int]) -> list[int]:
-        return self.board[position[0]][position[1]]
+    def get_cell(self, position: tuple[int, int]) -> tuple[int, ...]:
+        layout = self.layout
+        return layout.mask_values[self.cells[position[0] * layout.size + position[1]]]
+
+    def get_cell_mask(self, position: tuple[int, int]) -> int:
+        return self.cells[position[0] * self.layout.size + position[1]]
 
     def get_cell_value(self, position: tuple[int, int]) -> int | None:
-        return self.get_cell(position)[0] if not self.is_cell_failed(position) else None
+        layout = self.layout
+        mask = self.cells[position[0] * layout.size + position[1]]
+        return layout.mask_values[mask][0] if mask else None
 
     def _delete_cell_value(self, position: tuple[int, int], val: int) -> None:
-        self.board[position[0]][position[1]].remove(val) if val in self.board[position[0]][position[1]] else None
+        self.cells[position[0] * self.layout.size + position[1]] &= ~(1 << (val - 1))
 
     def set_cell_fixed_value(self, position: tuple[int, int], val: int) -> None:
-        self.board[position[0]][position[1]] = [val]
+        self.cells[position[0] * self.layout.size + position[1]] = 1 << (val - 1)
 
     def _can_cell_contain(self, position: tuple[int, int], val: int) -> bool:
-        return val in self.get_cell(position)
+        return bool(self.cells[position[0] * self.layout.size + position[1]] >> (val - 1) & 1)
 
     def all_cells_fixed(self) -> bool:
-        for row in range(BOARD_SIZE):
-            for column in range(BOARD_SIZE):
-                if not self.is_cell_fixed((row, column)):
-                    return False
-        return True
+        mask_sizes = self.layout.mask_sizes
+        return all(mask_sizes[mask] == 1 for mask in self.cells)
 
     def get_cell_fixed_count(self) -> int:
-        fixed_cnt = 0
-        for row in range(BOARD_SIZE):
-            for column in range(BOARD_SIZE):
-                if self.is_cell_fixed((row, column)):
-                    fixed_cnt += 1
-        return fixed_cnt
+        mask_sizes = self.layout.mask_sizes
+        return sum(mask_sizes[mask] == 1 for mask in self.cells)
 
     def not_solvable(self) -> bool:
-        for row in range(BOARD_SIZE):
-            for column in range(BOARD_SIZE):
-                if self.is_cell_failed((row, column)):
-                    return True
-        return False
+        return 0 in self.cells
 
     def propagate_constraints_all(self) -> None:
-        for row in range(BOARD_SIZE):
-            for column in range(BOARD_SIZE):
-                if self.is_cell_fixed((row, column)):
-                    self.propagate_constraints((row, column))
+        mask_sizes = self.layout.mask_sizes
+        for index in range(self.layout.cells_count):
+            if mask_sizes[self.cells[index]] == 1:
+                self._propagate_constraints_index(index)
 
     def propagate_constraints(self, position: tuple[int, int]) -> None:
-        self._propagate_constraints_row(position)
-        self._propagate_constraints_column(position)
-        self._propagate_constraints_square(position)
-
-    def _propagate_constraints_row(self, position: tuple[int, int]) -> None:
-        for column in range(BOARD_SIZE):
-            if self.is_cell_failed(position):
-                return
-
-            if column is not position[1]:
-                cell_coordintaes = (position[0], column)
-                self._propagate_constraints_cell(cell_coordintaes, position)
-
-    def _propagate_constraints_column(self, position: tuple[int, int]) -> None:
-        for row in range(BOARD_SIZE):
-            if self.is_cell_failed(position):
-                return
-
-            if row is not position[0]:
-                cell_coordintaes = (row, position[1])
-                self._propagate_constraints_cell(cell_coordintaes, position)
-
-    def _propagate_constraints_square(self, position: tuple[int, int]) -> None:
-        square_size = int(math.sqrt(BOARD_SIZE))
-        square_start_row = position[0] // square_size * square_size
-        square_start_column = position[1] // square_size * square_size
-
-        for row in range(square_start_row, square_start_row + square_size):
-            for column in range(square_start_column, square_start_column + square_size):
-                if self.is_cell_failed(position):
-                    return
-
-                if row != position[0] or column != position[1]:
-                    cell_coordintaes = (row, column)
-                    self._propagate_constraints_cell(cell_coordintaes, position)
-
-    def _propagate_constraints_cell(self, cell_coordintaes: tuple[int, int], position: tuple[int, int]) -> None:
-        if not self.is_cell_failed(cell_coordintaes):
-            if self.is_cell_fixed(cell_coordintaes) and self.get_cell_value(position):
-                self._delete_cell_value(cell_coordintaes, self.get_cell_value(position))  # type: ignore
-
-            elif self.get_cell_value(position):
-                self._delete_cell_value(cell_coordintaes, self.get_cell_value(position))  # type: ignore
-
-                if self.is_cell_fixed(cell_coordintaes):
-                    self.propagate_constraints(cell_coordintaes)
+        self._propagate_constraints_index(position[0] * self.layout.size + position[1])
+
+    def _propagate_constraints_index(self, index: int) -> None:
+        # Worklist of (fixed cell, next peer) frames: only newly fixed cells are pushed, in the same
+        # depth-first order as the row/column/square scan, and a cell stops propagating once it fails.
+        cells = self.cells
+        all_peers = self.layout.peers
+        mask_sizes = self.layout.mask_sizes
+        worklist = [(index, 0)]
+        while worklist:
+            source, peer_position = worklist.pop()
+            peers = all_peers[source]
+            while peer_position < len(peers):
+                mask = cells[source] & -cells[source]
+                if not mask:
+                    break
+
+                peer = peers[peer_position]
+                peer_position += 1
+                peer_mask = cells[peer]
+                if peer_mask & mask:
+                    peer_mask &= ~mask
+                    cells[peer] = peer_mask
+                    if mask_sizes[peer_mask] == 1:
+                        worklist.append((source, peer_position))
+                        worklist.append((peer, 0))
+                        break
+
+    def propagate_hidden_singles(self) -> None:
+        cells = self.cells
+        mask_sizes = self.layout.mask_sizes
+        changed = True
+        while changed:
+            changed = False
+            for unit in self.layout.units:
+                seen_once = seen_twice = 0
+                for index in unit:
+                    seen_twice |= seen_once & cells[index]
+                    seen_once |= cells[index]
+                hidden = seen_once & ~seen_twice
+                if not hidden:
+                    continue
+
+                for index in unit:
+                    mask = cells[index] & hidden
+                    if mask and mask_sizes[cells[index]] > 1:
+                        cells[index] = mask & -mask
+                        self._propagate_constraints_index(index)
+                        changed = True
+
+    def to_str(self) -> str:
+        mask_sizes, mask_values = self.layout.mask_sizes, self.layout.mask_values
+        return "".join(VALUE_CHARS[mask_values[mask][0] - 1] if mask_sizes[mask] == 1 else "." for mask in self.cells)
 
     def print(self) -> None:
+        size, square_size = self.layout.size, self.layout.square_size
+        width = 2 * square_size + 2 * size + 1
         print("")
-        for row in range(BOARD_SIZE):
-            if row % math.sqrt(BOARD_SIZE) == 0:
-                print("-------------------------")
+        for row in range(size):
+            if row % square_size == 0:
+                print("-" * width)
 
-            for column in range(BOARD_SIZE):
-                if column % math.sqrt(BOARD_SIZE) == 0:
+            for column in range(size):
+                if column % square_size == 0:
                     print("|", end=" ")
 
                 if self.is_cell_fixed((row, column)):
-                    print(self.get_cell_value((row, column)), end=" ")
+                    print(VALUE_CHARS[self.get_cell_value((row, column)) - 1], end=" ")
                 else:
                     print("-", end=" ")
 
             print("|")
 
-        print("-------------------------")
+        print("-" * width)
@@ -0,0 +1,90 @@
+try:
+    from Board import Board, get_layout
+    from utils import parse_board_str
+except ModuleNotFoundError:
+    from ACO.Board import Board, get_layout
+    from ACO.utils import parse_board_str
+import math
+import time
+
+
+class SearchLimitReached(Exception):
+    pass
+
+
+class ExactSolver:
+    """Deterministic backtracking over the Board candidate bitmasks.
+
+    Every node fixes a value in the cell with the fewest candidates left (MRV) and propagates it,
+    including hidden singles. The search can be bounded by a number of nodes or a time limit, which
+    makes it usable as a cheap pre-pass before the metaheuristics.
+    """
+
+    def __init__(self, max_nodes: int | None = None, time_limit_ms: float | None = None) -> None:
+        self.max_nodes = max_nodes
+        self.time_limit_ms = time_limit_ms
+
+    def solve(self, board: Board, print_step: bool = False) -> tuple[int, Board, list[int], int, int]:
+        """Returns the same tuple as Solver.solve, evaluations being the number of search nodes."""
+        solutions = self._search_all(board, 1)
+        if solutions:
+            return 0, solutions[0], [0], self.nodes, 1
+        not_fixed = board.layout.cells_count - board.get_cell_fixed_count()
+        return not_fixed, board, [not_fixed], self.nodes, 1
+
+    def count_solutions(self, board: Board, limit: int = 2) -> int:
+        return len(self._search_all(board, limit))
+
+    def _search_all(self, board: Board, limit: int) -> list[Board]:
+        self.nodes = 0
+        self.deadline = time.perf_counter() + self.time_limit_ms / 1000 if self.time_limit_ms is not None else None
+        solutions = []
+        start = board.copy()
+        start.propagate_hidden_singles()
+        try:
+            self._search(start, solutions, limit)
+        except SearchLimitReached:
+            pass
+        return solutions
+
+    def _search(self, board: Board, solutions: list[Board], limit: int) -> None:
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchLimitReached()
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchLimitReached()
+
+        masks = board.get_masks()
+        if 0 in masks:
+            return
+        mask_sizes = board.layout.mask_sizes
+        open_cells = [index for index, mask in enumerate(masks) if mask_sizes[mask] > 1]
+        if not open_cells:
+            solutions.append(board)
+            return
+
+        index = min(open_cells, key=lambda cell: mask_sizes[masks[cell]])
+        position = divmod(index, board.layout.size)
+        for value in board.layout.mask_values[masks[index]]:
+            child = board.copy()
+            child.set_cell_fixed_value(position, value)
+            child.propagate_constraints(position)
+            child.propagate_hidden_singles()
+            self._search(child, solutions, limit)
+            if len(solutions) >= limit:
+                return
+
+
+def is_valid_solution(solution: str, puzzle: str | None = None) -> bool:
+    """Checks that a solution string has every unit filled with distinct values and keeps the puzzle's givens."""
+    try:
+        values = parse_board_str(solution)
+        givens = parse_board_str(puzzle) if puzzle is not None else []
+    except ValueError:
+        return False
+    size = math.isqrt(len(values))
+    if size * size != len(values) or math.isqrt(size) ** 2 != size or not all(1 <= value <= size for value in values):
+        return False
+    if any(given and given != value for given, value in zip(givens, values)):
+        return False
+    return all(len({values[index] for index in unit}) == size for unit in get_layout(size).units)
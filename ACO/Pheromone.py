@@ -0,0 +1,73 @@
+try:
+    from Board import BOARD_SIZE, MAX_TABLE_SIZE, get_layout
+except ModuleNotFoundError:
+    from ACO.Board import BOARD_SIZE, MAX_TABLE_SIZE, get_layout
+from functools import lru_cache
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def _value_indexes(size: int) -> tuple:
+    # Column indexes of a cell's candidates and of its lowest candidate, both keyed by the cell's bitmask.
+    # Boards too large for the mask tables compute them from the mask instead.
+    if size > MAX_TABLE_SIZE:
+        return None, None
+    mask_values = get_layout(size).mask_values
+    candidate_indexes = tuple(np.array(values, dtype=np.intp) - 1 for values in mask_values)
+    lowest_value_indexes = np.array([values[0] - 1 if values else 0 for values in mask_values], dtype=np.intp)
+    return candidate_indexes, lowest_value_indexes
+
+
+CANDIDATE_INDEXES, LOWEST_VALUE_INDEXES = _value_indexes(BOARD_SIZE)
+
+
+class PheromoneMatrix:
+    """Pheromone of every (cell, value) pair stored as one contiguous (cells, size) float64 array, (81, 9) for 9x9 boards."""
+
+    def __init__(self, initial_value: float | None = None, values: np.ndarray | None = None, size: int = BOARD_SIZE) -> None:
+        if values is not None:
+            size = values.shape[1]
+        self.size = size
+        self.initial_value = initial_value if initial_value is not None else 1 / size**2
+        if values is None:
+            values = np.full((size * size, size), self.initial_value)
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+        self.candidate_indexes, self.lowest_value_indexes = _value_indexes(size)
+
+    def copy(self) -> "PheromoneMatrix":
+        return PheromoneMatrix(self.initial_value, self.values.copy())
+
+    def get_cell(self, index: int, mask: int) -> np.ndarray:
+        if self.candidate_indexes is None:
+            return self.values[index, np.flatnonzero((mask >> np.arange(self.size)) & 1)]
+        return self.values[index, self.candidate_indexes[mask]]
+
+    def local_update(self, index: int, value: int, local_pher_update: float) -> None:
+        row = self.values[index]
+        row[value - 1] = (1 - local_pher_update) * row[value - 1] + local_pher_update * self.initial_value
+
+    def local_update_many(self, indexes: np.ndarray, value_indexes: np.ndarray, local_pher_update: float) -> None:
+        # Repeated (cell, value) pairs are applied one after another: k updates keep (1 - rate)^k of the old value.
+        pairs, counts = np.unique(indexes * self.size + value_indexes, return_counts=True)
+        kept = (1 - local_pher_update) ** counts
+        flat = self.values.reshape(-1)
+        flat[pairs] = kept * flat[pairs] + (1 - kept) * self.initial_value
+
+    def global_update(self, masks: np.ndarray, global_pher_update: float, pheromone_to_add: float) -> None:
+        cells = np.flatnonzero(masks)
+        if self.lowest_value_indexes is None:
+            lowest = masks[cells].astype(np.int64)
+            values = np.log2(lowest & -lowest).astype(np.intp)
+        else:
+            values = self.lowest_value_indexes[masks[cells]]
+        self.values[cells, values] = self.values[cells, values] * (1 - global_pher_update) + global_pher_update * pheromone_to_add
+
+    def save(self, file_path: str) -> None:
+        np.save(file_path, self.values)
+
+    @classmethod
+    def load(cls, file_path: str, initial_value: float | None = None, size: int = BOARD_SIZE) -> "PheromoneMatrix":
+        values = np.load(file_path)
+        if values.shape != (size * size, size):
+            raise ValueError(f"Pheromone matrix in {file_path} has shape {values.shape}, expected {(size * size, size)}")
+        return cls(initial_value, values)
@@ -1,21 +1,50 @@
 try:
-    from Board import Board, BOARD_SIZE
+    from Board import Board
+    from Pheromone import PheromoneMatrix
 except ModuleNotFoundError:
-    from ACO.Board import Board, BOARD_SIZE
-import copy
-import random
+    from ACO.Board import Board
+    from ACO.Pheromone import PheromoneMatrix
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from typing import Iterator, NamedTuple
+import time
 import numpy as np
 
+# Uniform numbers drawn from a solve's generator at once, an iteration of 100 ants on a hard 9x9 board uses about 200.
+UNIFORM_CHUNK = 1024
+
+
+def uniform_stream(rng: np.random.Generator, chunk: int = UNIFORM_CHUNK) -> Iterator[float]:
+    """Endless stream of uniform floats in [0, 1) drawn from rng chunk at a time, as Python floats."""
+    while True:
+        yield from rng.random(chunk).tolist()
+
 
 class Ant:
-    def __init__(self, board: Board, pheromone_matrix: list[list[dict[int, float]]], local_pher_update: float, greedines: float) -> None:
+    def __init__(
+        self,
+        board: Board,
+        pheromone_matrix: PheromoneMatrix,
+        local_pher_update: float,
+        greedines: float,
+        hidden_singles: bool = False,
+        uniforms: Iterator[float] | None = None,
+        start: int = 0,
+    ) -> None:
         self.local_pher_update = local_pher_update
         self.greedines = greedines
-        self.initial_pheromone_value = 1 / BOARD_SIZE**2
+        self.hidden_singles = hidden_singles
         self.board = board
         self.pheromone_matrix = pheromone_matrix
-        self.row = random.randint(0, BOARD_SIZE - 1)
-        self.column = random.randint(0, BOARD_SIZE - 1)
+        self.size = board.layout.size
+        # The ants of a solve share its stream, start (the first cell) is drawn by the Solver for all ants at once.
+        self.uniforms = uniforms if uniforms is not None else uniform_stream(np.random.default_rng())
+        self.row, self.column = divmod(start, self.size)
+
+    def reset(self, board: Board, pheromone_matrix: PheromoneMatrix, start: int = 0) -> None:
+        self.board.restore(board)
+        self.pheromone_matrix = pheromone_matrix
+        self.row, self.column = divmod(start, self.size)
 
     def step(self) -> None:
         if not self.board.is_cell_fixed((self.row, self.column)) and not self.board.is_cell_failed((self.row, self.column)):
@@ -25,26 +54,39 @@ class Ant:
         value = self._select_value()
         self.board.set_cell_fixed_value((self.row, self.column), value)  # type: ignore
         self.board.propagate_constraints((self.row, self.column))
-        self.board.propagate_constraints_all()
-        pher_value_to_update = self.pheromone_matrix[self.row][self.column][value]
-        self.pheromone_matrix[self.row][self.column][value] = (
-            1 - self.local_pher_update
-        ) * pher_value_to_update + self.local_pher_update * self.initial_pheromone_value
-        self.row, self.column = (self.row, self.column + 1) if self.column < BOARD_SIZE - 1 else ((self.row + 1) % 9, 0)
+        if self.board.not_solvable():
+            # Propagation is cut short on failed cells, only then the other fixed cells need a rescan.
+            self.board.propagate_constraints_all()
+        if self.hidden_singles:
+            self.board.propagate_hidden_singles()
+        self.pheromone_matrix.local_update(self.row * self.size + self.column, value, self.local_pher_update)
+        self.row, self.column = (self.row, self.column + 1) if self.column < self.size - 1 else ((self.row + 1) % self.size, 0)
 
     def _select_value(self) -> int:
-        pheromone = self.pheromone_matrix[self.row][self.column]
-        possible_values = self.board.get_cell((self.row, self.column))
+        mask = self.board.get_cell_mask((self.row, self.column))
+        pheromone = self.pheromone_matrix.get_cell(self.row * self.size + self.column, mask)
+        possible_values = self.board.layout.mask_values[mask]
 
-        if random.random() > self.greedines:
-            best_value = max(possible_values, key=lambda value: pheromone[value], default=0)
+        greedy_draw, spin_draw = next(self.uniforms), next(self.uniforms)
+        if greedy_draw > self.greedines:
+            best_value = possible_values[np.argmax(pheromone)]
         else:
-            total_pheromone = np.cumsum([pheromone[value] for value in possible_values])
-            spin_value = total_pheromone[-1] * random.random()
+            total_pheromone = np.cumsum(pheromone)
+            spin_value = total_pheromone[-1] * spin_draw
             best_value = possible_values[np.searchsorted(total_pheromone, spin_value)]
         return best_value
 
 
+class Progress(NamedTuple):
+    """Snapshot yielded by Solver.iterate after every iteration."""
+
+    iteration: int
+    score: int
+    best_solution: Board
+    evaluations: int
+    elapsed: float
+
+
 class Solver:
     def __init__(
         self,
@@ -55,6 +97,10 @@ class Solver:
         evaporation_parameter: float,
         max_iterations: int,
         max_evaluations: int = None,
+        hidden_singles: bool = False,
+        initial_pheromone: PheromoneMatrix | None = None,
+        time_limit_ms: float | None = None,
+        seed: int | np.random.SeedSequence | None = None,
     ) -> tuple[int, Board, list[int], int]:
         self.ants_number = ants_number
         self.global_pher_update = global_pher_update
@@ -64,67 +110,200 @@ class Solver:
         self.best_pheromone_to_add = 0
         self.max_iterations = max_iterations
         self.max_evaluations = max_evaluations
+        self.hidden_singles = hidden_singles
+        self.initial_pheromone = initial_pheromone
+        self.time_limit_ms = time_limit_ms
+        self.seed = seed
+
+    def solve(self, board: Board, print_step: bool = False, stop_event=None) -> tuple[int, Board, list[int], int, int]:
+        """Solves the board, returning the score, the best board, the best score of every evaluation, evaluations and iterations.
+
+        Besides max_iterations and max_evaluations the run stops after the iteration during which
+        time_limit_ms passed or stop_event (e.g. a threading.Event) was set, with the best board so far.
+        Every solve draws from its own generator seeded with seed, so solves with the same seed are identical.
+        """
+        for progress in self.iterate(board, stop_event):
+            if print_step:
+                print(
+                    f"Fixed {round((1 - progress.score / board.layout.cells_count) * 100, 2)} % of the cells, iteration: {progress.iteration}/{self.max_iterations}",
+                    end="\r"
+                )
+        return self._result()
 
-    def solve(self, board: Board, print_step: bool = False) -> Board:
+    def iterate(self, board: Board, stop_event=None) -> Iterator[Progress]:
+        """Solves like solve, yielding a Progress after every iteration, the caller can stop early by not asking for the next one."""
+        self._start(board)
+        yield from self._iterate(self.max_iterations, stop_event)
+
+    def solve_parallel(
+        self,
+        board: Board,
+        workers: int,
+        exchange_interval: int = 10,
+        seed: int | None = None,
+        print_step: bool = False,
+        stop_event=None,
+    ) -> tuple[int, Board, list[int], int, int]:
+        """Island model: independent colonies run in worker processes and exchange their state every exchange_interval iterations.
+
+        At every exchange all colonies continue from the best board found so far and from the mean of their
+        pheromone matrices. The run stops as soon as one colony fixes every cell. The colonies get what is
+        left of time_limit_ms, stop_event is only checked at the exchanges. Every colony and epoch gets its
+        own generator spawned from seed, or from the solver's seed when it is None.
+        """
+        deadline = time.perf_counter() + self.time_limit_ms / 1000 if self.time_limit_ms is not None else None
+        colony_seeds = np.random.SeedSequence(seed if seed is not None else self.seed).spawn(workers)
+        initial_pheromone = self.initial_pheromone if self.initial_pheromone is not None else PheromoneMatrix(size=board.layout.size)
+        pheromones = [initial_pheromone.copy() for _ in range(workers)]
+        best_pheromones_to_add = [0] * workers
+        best_solution = board
+        solutions = []
+        evaluations = 0
+        iterations = 0
+        with Manager() as manager, ProcessPoolExecutor(workers) as executor:
+            solved_event = manager.Event()
+            while iterations < self.max_iterations:
+                epoch = min(exchange_interval, self.max_iterations - iterations)
+                futures = [
+                    executor.submit(
+                        _run_colony, self._colony_parameters(deadline), board, best_solution, pheromones[colony],
+                        best_pheromones_to_add[colony], epoch, colony_seeds[colony].spawn(1)[0], solved_event,
+                    )
+                    for colony in range(workers)
+                ]
+                epoch_iterations = 0
+                # Results are merged in colony order, so a seeded run does not depend on which colony finishes first.
+                for colony, future in enumerate(futures):
+                    (_, colony_best, colony_solutions, colony_evaluations, colony_iterations), pheromones[colony], best_pheromones_to_add[colony] = future.result()
+                    if colony_best.get_cell_fixed_count() > best_solution.get_cell_fixed_count():
+                        best_solution = colony_best
+                    solutions.extend(min(solution, solutions[-1]) if solutions else solution for solution in colony_solutions)
+                    evaluations += colony_evaluations
+                    epoch_iterations = max(epoch_iterations, colony_iterations)
+                iterations += epoch_iterations
+                mean_pheromone = np.mean([pheromone.values for pheromone in pheromones], axis=0)
+                self.global_pher_matrix = PheromoneMatrix(initial_pheromone.initial_value, mean_pheromone)
+                if print_step:
+                    print(
+                        f"Fixed {round(best_solution.get_cell_fixed_count()/board.layout.cells_count * 100 , 2)} % of the cells, iteration: {iterations}/{self.max_iterations}",
+                        end="\r"
+                    )
+                if best_solution.all_cells_fixed():
+                    return 0, best_solution, solutions, evaluations, iterations
+                if self.max_evaluations and evaluations >= self.max_evaluations:
+                    break
+                if (deadline is not None and time.perf_counter() >= deadline) or (stop_event is not None and stop_event.is_set()):
+                    break
+                pheromones = [self.global_pher_matrix.copy() for _ in range(workers)]
+        return board.layout.cells_count - best_solution.get_cell_fixed_count(), best_solution, solutions, evaluations, iterations
+
+    def _colony_parameters(self, deadline: float | None) -> dict:
+        # The evaluation budget is shared by all colonies, so it is checked by solve_parallel instead.
+        return dict(
+            ants_number=self.ants_number, global_pher_update=self.global_pher_update, local_pher_update=self.local_pher_update,
+            greedines=self.greedines, evaporation_parameter=self.evaporation_parameter, max_iterations=self.max_iterations,
+            hidden_singles=self.hidden_singles,
+            time_limit_ms=max(deadline - time.perf_counter(), 0) * 1000 if deadline is not None else None,
+        )
+
+    def _start(self, board: Board) -> None:
         self.board_to_solve = board
+        self.rng = np.random.default_rng(self.seed)
+        self.uniforms = uniform_stream(self.rng)
+        self.ants: list[Ant] = []
         self._initialize_global_pheromone()
         self._initialize_ants()
         self.best_solution = board
-        solutions = []
-        evaluations = 0
-        for iter in range(self.max_iterations):
+        self.solutions = []
+        self.evaluations = 0
+        self.iterations = 0
+        self.start_time = time.perf_counter()
+        self.deadline = self.start_time + self.time_limit_ms / 1000 if self.time_limit_ms is not None else None
+
+    def _run(self, iterations: int, stop_event=None) -> tuple[int, Board, list[int], int, int]:
+        for _ in self._iterate(iterations, stop_event):
+            pass
+        return self._result()
+
+    def _result(self) -> tuple[int, Board, list[int], int, int]:
+        score = self.board_to_solve.layout.cells_count - self.best_solution.get_cell_fixed_count()
+        return score, self.best_solution, self.solutions, self.evaluations, self.iterations
+
+    def _iterate(self, iterations: int, stop_event=None) -> Iterator[Progress]:
+        solutions = self.solutions
+        cells_count = self.board_to_solve.layout.cells_count
+        for _ in range(iterations):
+            self.iterations += 1
             self._initialize_ants()
-            for _ in range(BOARD_SIZE**2):
+            for _ in range(cells_count):
                 for ant in self.ants:
                     ant.step()
             best_ant = None
             for ant in self.ants:
-                if len(solutions)==0 or BOARD_SIZE**2 - ant.board.get_cell_fixed_count() < solutions[-1]:
+                if len(solutions)==0 or cells_count - ant.board.get_cell_fixed_count() < solutions[-1]:
                     best_ant = ant
-                    solutions.append(BOARD_SIZE**2 - ant.board.get_cell_fixed_count())
+                    solutions.append(cells_count - ant.board.get_cell_fixed_count())
                 else:
                     solutions.append(solutions[-1])
-                evaluations += 1
+                self.evaluations += 1
             if best_ant:
                 self.best_solution = (
-                    best_ant.board if best_ant.board.get_cell_fixed_count() > self.best_solution.get_cell_fixed_count() else self.best_solution
+                    best_ant.board.copy() if best_ant.board.get_cell_fixed_count() > self.best_solution.get_cell_fixed_count() else self.best_solution
                 )
                 for _ in range(2):
                     solutions.append(solutions[-1])
-                    evaluations += 1
-            if self.max_evaluations and evaluations >= self.max_evaluations:
-                return BOARD_SIZE**2 - self.best_solution.get_cell_fixed_count(), self.best_solution, solutions, evaluations, iter+1
-            if print_step:
-                print(
-                    f"Fixed {round(self.best_solution.get_cell_fixed_count()/BOARD_SIZE**2 * 100 , 2)} % of the cells, iteration: {iter}/{self.max_iterations}",
-                    end="\r"
-                )
+                    self.evaluations += 1
+            yield Progress(
+                self.iterations, cells_count - self.best_solution.get_cell_fixed_count(), self.best_solution, self.evaluations,
+                time.perf_counter() - self.start_time,
+            )
+            if self.max_evaluations and self.evaluations >= self.max_evaluations:
+                return
             if self.best_solution.all_cells_fixed():
-                return 0, self.best_solution, solutions, evaluations, iter+1
+                return
             self._update_pheromone_matrix(self.best_solution)
-        return BOARD_SIZE**2 - self.best_solution.get_cell_fixed_count(), self.best_solution, solutions, evaluations, iter+1
+            if (self.deadline is not None and time.perf_counter() >= self.deadline) or (stop_event is not None and stop_event.is_set()):
+                return
 
     def _initialize_global_pheromone(self) -> None:
-        self.global_pher_matrix = [
-            [{num: 1 / BOARD_SIZE**2 for num in range(1, BOARD_SIZE + 1)} for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)
-        ]
+        if self.initial_pheromone is not None:
+            self.global_pher_matrix = self.initial_pheromone.copy()
+        else:
+            self.global_pher_matrix = PheromoneMatrix(size=self.board_to_solve.layout.size)
 
     def _initialize_ants(self) -> None:
-        self.ants: list[Ant] = []
-        for _ in range(self.ants_number):
-            ant = Ant(copy.deepcopy(self.board_to_solve), self.global_pher_matrix, self.local_pher_update, self.greedines)
+        # Ants are pooled for the whole solve, each iteration only restores their boards from the template.
+        starts = self.rng.integers(0, self.board_to_solve.layout.cells_count, size=self.ants_number).tolist()
+        for ant, start in zip(self.ants, starts):
+            ant.reset(self.board_to_solve, self.global_pher_matrix, start)
+        for start in starts[len(self.ants):]:
+            ant = Ant(
+                self.board_to_solve.copy(), self.global_pher_matrix, self.local_pher_update, self.greedines, self.hidden_singles,
+                self.uniforms, start,
+            )
             self.ants.append(ant)
 
     def _update_pheromone_matrix(self, best_ant_board: Board) -> None:
-        pheromone_to_add = BOARD_SIZE**2 / (BOARD_SIZE**2 - best_ant_board.get_cell_fixed_count())
+        pheromone_to_add = best_ant_board.layout.cells_count / (best_ant_board.layout.cells_count - best_ant_board.get_cell_fixed_count())
 
         if pheromone_to_add > self.best_pheromone_to_add:
             self.solution = best_ant_board
             self.best_pheromone_to_add = pheromone_to_add
 
-        for row in range(BOARD_SIZE):
-            for column in range(BOARD_SIZE):
-                if not best_ant_board.is_cell_failed((row, column)):
-                    value = best_ant_board.get_cell_value((row, column))
-                    self.global_pher_matrix[row][column][value] = self.global_pher_matrix[row][column][value] * (1 - self.global_pher_update) + self.global_pher_update * self.best_pheromone_to_add  # type: ignore
+        self.global_pher_matrix.global_update(np.array(best_ant_board.get_masks()), self.global_pher_update, self.best_pheromone_to_add)
         self.best_pheromone_to_add *= 1 - self.evaporation_parameter
+
+
+def _run_colony(
+    parameters: dict, board: Board, best_solution: Board, pheromone: PheromoneMatrix, best_pheromone_to_add: float,
+    iterations: int, seed_sequence: np.random.SeedSequence, stop_event,
+) -> tuple[tuple[int, Board, list[int], int, int], PheromoneMatrix, float]:
+    solver = Solver(**parameters, initial_pheromone=pheromone, seed=seed_sequence)
+    solver._start(board)
+    solver.best_solution = best_solution
+    solver.best_pheromone_to_add = best_pheromone_to_add
+    result = solver._run(iterations, stop_event=stop_event)
+    if result[0] == 0:
+        # The other colonies stop at their next iteration.
+        stop_event.set()
+    return result, solver.global_pher_matrix, solver.best_pheromone_to_add
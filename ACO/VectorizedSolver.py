@@ -0,0 +1,256 @@
+try:
+    from Board import Board, BOARD_SIZE, CELLS_COUNT, PEERS, UNITS, MASK_SIZES
+    from Pheromone import PheromoneMatrix
+except ModuleNotFoundError:
+    from ACO.Board import Board, BOARD_SIZE, CELLS_COUNT, PEERS, UNITS, MASK_SIZES
+    from ACO.Pheromone import PheromoneMatrix
+import time
+import numpy as np
+
+VALUE_BITS = (1 << np.arange(BOARD_SIZE)).astype(np.uint16)
+SIZES = np.array(MASK_SIZES, dtype=np.int8)
+# UNIT_INDEXES[i, u] is the i-th cell of unit u, CELL_UNITS[:, index] the cell's row, column and square unit.
+UNIT_INDEXES = np.array(UNITS, dtype=np.intp).T
+CELL_UNITS = np.array([[unit for unit, cells in enumerate(UNITS) if index in cells] for index in range(CELLS_COUNT)], dtype=np.intp).T
+PEER_INDEXES = np.array(PEERS, dtype=np.intp)
+LOWER_PEERS = PEER_INDEXES < np.arange(CELLS_COUNT)[:, None]
+
+
+def _fixed(candidates: np.ndarray) -> np.ndarray:
+    # Single bit masks, cheaper than looking the masks up in SIZES.
+    return ((candidates & (candidates - 1)) == 0) & (candidates != 0)
+
+
+def _lower_duplicates(candidates: np.ndarray, peer_masks: np.ndarray) -> np.ndarray:
+    # Cells of an (ants, 81) array whose mask equals that of a lower peer in peer_masks.
+    return ((peer_masks[:, PEER_INDEXES] == candidates[:, :, None]) & LOWER_PEERS).any(axis=2)
+
+
+class _BoardRun:
+    """One board of a batch: its pheromone matrix, generator, best board so far and result once finished."""
+
+    def __init__(self, index: int, board: Board, pheromone: PheromoneMatrix, seed: int | None, deadline: float | None, best_pheromone_to_add: float) -> None:
+        self.index = index
+        self.template = np.array(board.get_masks(), dtype=np.uint16)
+        self.pheromone = pheromone
+        self.rng = np.random.default_rng(seed)
+        self.deadline = deadline
+        self.best_pheromone_to_add = best_pheromone_to_add
+        self.best_solution = self.template
+        self.best_fixed_count = board.get_cell_fixed_count()
+        self.solutions = []
+        self.evaluations = 0
+        self.iterations = 0
+        self.result = None
+
+    def finish(self) -> None:
+        self.result = CELLS_COUNT - self.best_fixed_count, Board.from_masks(self.best_solution.tolist()), self.solutions, self.evaluations, self.iterations
+
+
+class VectorizedSolver:
+    """ACO solver stepping all ants at once.
+
+    Every ant's board is one row of an (ants, 81) array of candidate bitmasks, the same encoding
+    as Board.cells of a 9x9 board, so the value selection and constraint propagation are batched array operations.
+    solve_batch stacks the ants of several boards into the same array.
+    """
+
+    def __init__(
+        self,
+        ants_number: int,
+        global_pher_update: float,
+        local_pher_update: float,
+        greedines: float,
+        evaporation_parameter: float,
+        max_iterations: int,
+        max_evaluations: int = None,
+        seed: int | None = None,
+        initial_pheromone: PheromoneMatrix | None = None,
+        time_limit_ms: float | None = None,
+    ) -> None:
+        self.ants_number = ants_number
+        self.global_pher_update = global_pher_update
+        self.local_pher_update = local_pher_update
+        self.greedines = greedines
+        self.evaporation_parameter = evaporation_parameter
+        self.best_pheromone_to_add = 0
+        self.max_iterations = max_iterations
+        self.max_evaluations = max_evaluations
+        self.initial_pheromone = initial_pheromone
+        self.seed = seed
+        self.time_limit_ms = time_limit_ms
+
+    def solve(self, board: Board, print_step: bool = False, stop_event=None) -> tuple[int, Board, list[int], int, int]:
+        """Same as Solver.solve, including the time limit and stop_event checked after every iteration.
+
+        Like Solver, every solve creates its own generator from seed, so solves with the same seed are identical.
+        """
+        (run,) = self._solve_runs([board], [self.seed], [self.time_limit_ms], print_step, stop_event)
+        self.best_pheromone_to_add = run.best_pheromone_to_add
+        return run.result
+
+    def solve_batch(
+        self, boards: list[Board], seeds: list[int | None] | None = None, time_limits_ms: list[float | None] | None = None, stop_event=None
+    ) -> list[tuple[int, Board, list[int], int, int]]:
+        """solve for several boards at once, seeds and time limits are per board and default to seed and time_limit_ms.
+
+        The ants of all boards are rows of one candidate array, so a step and a propagation pass are the
+        same array operations for the whole batch. Every board has its own pheromone matrix, generator
+        and time limit and leaves the batch when it finishes, so its result is the one solve gives with
+        its seed, whatever else is in the batch. global_pher_matrix then stacks the boards' matrices.
+        """
+        seeds = seeds if seeds is not None else [self.seed] * len(boards)
+        time_limits_ms = time_limits_ms if time_limits_ms is not None else [self.time_limit_ms] * len(boards)
+        return [run.result for run in self._solve_runs(boards, seeds, time_limits_ms, False, stop_event)]
+
+    def _solve_runs(self, boards: list[Board], seeds: list, time_limits_ms: list, print_step: bool, stop_event) -> list[_BoardRun]:
+        start = time.perf_counter()
+        for board in boards:
+            if board.layout.size != BOARD_SIZE:
+                raise ValueError(f"VectorizedSolver only solves {BOARD_SIZE}x{BOARD_SIZE} boards, use Solver for {board.layout.size}x{board.layout.size}")
+        initial_pheromone = self.initial_pheromone if self.initial_pheromone is not None else PheromoneMatrix()
+        # Board i's pheromone is rows 81 * i to 81 * (i + 1), every run updates its own view of them.
+        self.global_pher_matrix = PheromoneMatrix(initial_pheromone.initial_value, np.tile(initial_pheromone.values, (len(boards), 1)))
+        runs = [
+            _BoardRun(
+                index,
+                board,
+                PheromoneMatrix(initial_pheromone.initial_value, self.global_pher_matrix.values[index * CELLS_COUNT : (index + 1) * CELLS_COUNT]),
+                seed,
+                start + time_limit_ms / 1000 if time_limit_ms is not None else None,
+                self.best_pheromone_to_add,
+            )
+            for index, (board, seed, time_limit_ms) in enumerate(zip(boards, seeds, time_limits_ms))
+        ]
+        for _ in range(self.max_iterations):
+            self.runs = [run for run in runs if run.result is None]
+            if not self.runs:
+                break
+            self.candidates = np.repeat(np.array([run.template for run in self.runs]), self.ants_number, axis=0)
+            self.pheromone_offsets = np.repeat([run.index * CELLS_COUNT for run in self.runs], self.ants_number)
+            self.positions = np.concatenate([run.rng.integers(0, CELLS_COUNT, size=self.ants_number) for run in self.runs])
+            for _ in range(CELLS_COUNT):
+                if not self._step():
+                    break
+            for slot, run in enumerate(self.runs):
+                self._end_iteration(run, self.candidates[slot * self.ants_number : (slot + 1) * self.ants_number], print_step, stop_event)
+        for run in runs:
+            if run.result is None:
+                run.finish()
+        return runs
+
+    def _end_iteration(self, run: _BoardRun, candidates: np.ndarray, print_step: bool, stop_event) -> None:
+        # Records the iteration's ants of one board like Solver does and finishes the board when it is done.
+        run.iterations += 1
+        not_fixed = CELLS_COUNT - _fixed(candidates).sum(axis=1)
+        previous = not_fixed[0] + 1 if len(run.solutions) == 0 else run.solutions[-1]
+        run.solutions.extend(np.minimum.accumulate(np.minimum(not_fixed, previous)).tolist())
+        run.evaluations += self.ants_number
+        if not_fixed.min() < previous:
+            best_ant = int(np.argmin(not_fixed))
+            if CELLS_COUNT - not_fixed[best_ant] > run.best_fixed_count:
+                run.best_solution = candidates[best_ant].copy()
+                run.best_fixed_count = CELLS_COUNT - int(not_fixed[best_ant])
+            for _ in range(2):
+                run.solutions.append(run.solutions[-1])
+                run.evaluations += 1
+        if self.max_evaluations and run.evaluations >= self.max_evaluations:
+            run.finish()
+            return
+        if print_step:
+            print(
+                f"Fixed {round(run.best_fixed_count / CELLS_COUNT * 100, 2)} % of the cells, iteration: {run.iterations - 1}/{self.max_iterations}",
+                end="\r",
+            )
+        if run.best_fixed_count == CELLS_COUNT:
+            run.finish()
+            return
+        self._update_pheromone_matrix(run)
+        if (run.deadline is not None and time.perf_counter() >= run.deadline) or (stop_event is not None and stop_event.is_set()):
+            run.finish()
+
+    def _step(self) -> bool:
+        # Like Ant.step, an ant only moves on after updating a cell, so an ant standing on a fixed
+        # or failed cell stays there; once no ant can move the remaining steps are skipped.
+        cells = self.candidates[np.arange(len(self.candidates)), self.positions]
+        ants = np.flatnonzero(SIZES[cells] > 1)
+        if len(ants) == 0:
+            return False
+
+        positions = self.positions[ants]
+        self.positions[ants] = (positions + 1) % CELLS_COUNT
+        pheromone_rows = self.pheromone_offsets[ants] + positions
+        values = self._select_values(cells[ants], pheromone_rows, ants)
+        candidates = self.candidates[ants]
+        candidates[np.arange(len(ants)), positions] = VALUE_BITS[values]
+        self._propagate_constraints(candidates)
+        self.candidates[ants] = candidates
+
+        self.global_pher_matrix.local_update_many(pheromone_rows, values, self.local_pher_update)
+        return True
+
+    def _select_values(self, cells: np.ndarray, pheromone_rows: np.ndarray, ants: np.ndarray) -> np.ndarray:
+        possible = (cells[:, None] & VALUE_BITS) > 0
+        pheromone = np.where(possible, self.global_pher_matrix.values[pheromone_rows], 0)
+        greedy = np.argmax(np.where(possible, pheromone, -1), axis=1)
+        total_pheromone = np.cumsum(pheromone, axis=1)
+        spins, choices = self._uniforms(ants)
+        spin_values = total_pheromone[:, -1] * (1 - spins)
+        roulette = (total_pheromone < spin_values[:, None]).sum(axis=1)
+        return np.where(choices > self.greedines, greedy, roulette)
+
+    def _uniforms(self, ants: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # Roulette spins and greedy choices of the moving ants, every board's drawn from its own generator.
+        bounds = np.searchsorted(ants, np.arange(len(self.runs) + 1) * self.ants_number)
+        spins, choices = [], []
+        for run, start, stop in zip(self.runs, bounds[:-1], bounds[1:]):
+            if stop > start:
+                spins.append(run.rng.random(stop - start))
+                choices.append(run.rng.random(stop - start))
+        return np.concatenate(spins), np.concatenate(choices)
+
+    def _propagate_constraints(self, candidates: np.ndarray) -> None:
+        # Every pass only works on the ants whose boards the previous pass changed.
+        ants = np.arange(len(candidates))
+        boards = candidates
+        while True:
+            fixed = _fixed(boards)
+            units = (boards * fixed)[:, UNIT_INDEXES]
+            unions = np.bitwise_or.reduce(units, axis=1)
+            # Fixed masks in a unit sum to their union unless two of them share a value.
+            conflicts = (units.sum(axis=1, dtype=np.uint16) != unions).any(axis=1)
+            if conflicts.any():
+                boards[conflicts] = self._resolve_conflicts(boards[conflicts])
+                continue
+
+            seen = unions[:, CELL_UNITS[0]] | unions[:, CELL_UNITS[1]] | unions[:, CELL_UNITS[2]]
+            propagated = boards & ~(seen * ~fixed)
+            changed = (propagated != boards).any(axis=1)
+            candidates[ants] = propagated
+            if not changed.any():
+                return
+            ants = ants[changed]
+            boards = propagated[changed]
+
+    @staticmethod
+    def _resolve_conflicts(candidates: np.ndarray) -> np.ndarray:
+        """Peers fixed to the same value at once: the lower index keeps it, as in Board's scan order.
+
+        A cell only loses its value to a lower peer that keeps it, so cells are decided in rounds: a cell
+        without a lower duplicate among the undecided and kept cells is kept, one with a lower duplicate
+        among the kept cells is cleared. Every round decides at least the lowest undecided cell.
+        """
+        fixed = SIZES[candidates] == 1
+        kept = np.zeros_like(fixed)
+        undecided = fixed.copy()
+        while undecided.any():
+            kept |= undecided & ~_lower_duplicates(candidates, np.where(kept | undecided, candidates, 0))
+            undecided &= ~kept & ~_lower_duplicates(candidates, np.where(kept, candidates, 0))
+        return np.where(fixed & ~kept, 0, candidates)
+
+    def _update_pheromone_matrix(self, run: _BoardRun) -> None:
+        pheromone_to_add = CELLS_COUNT / (CELLS_COUNT - run.best_fixed_count)
+        if pheromone_to_add > run.best_pheromone_to_add:
+            run.best_pheromone_to_add = pheromone_to_add
+        run.pheromone.global_update(run.best_solution, self.global_pher_update, run.best_pheromone_to_add)
+        run.best_pheromone_to_add *= 1 - self.evaporation_parameter
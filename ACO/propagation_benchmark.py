@@ -0,0 +1,49 @@
+from Board import Board, BOARD_SIZE
+from Solver import Solver
+from argparse import ArgumentParser
+from utils import get_boards_from_file
+import time
+
+
+class RescanBoard(Board):
+    # Previous behaviour: every propagation is followed by a rescan of all fixed cells.
+    def propagate_constraints(self, position: tuple[int, int]) -> None:
+        super().propagate_constraints(position)
+        self.propagate_constraints_all()
+
+
+def measure(boards: list[Board], args, hidden_singles: bool) -> tuple[float, list[int]]:
+    steps = 0
+    scores = []
+    start = time.perf_counter()
+    for board in boards:
+        solver = Solver(args.antsNum, 0.9, 0.1, 0.9, 0.005, args.iterations, hidden_singles=hidden_singles, seed=args.seed)
+        score, _, _, _, iterations = solver.solve(board)
+        steps += iterations * BOARD_SIZE**2 * args.antsNum
+        scores.append(score)
+    return steps / (time.perf_counter() - start), scores
+
+
+def main():
+    parser = ArgumentParser(description="Ant steps per second with full rescan and incremental propagation")
+    parser.add_argument("difficulty", help="Difficulty of the sudoku boards")
+    parser.add_argument("-antsNum", "--antsNum", type=int, default=100, help="Number of ants")
+    parser.add_argument("-iter", "--iterations", type=int, default=5, help="Number of iterations")
+    parser.add_argument("-seed", "--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    try:
+        boards = get_boards_from_file(f"../resources/{args.difficulty}.txt")
+    except FileNotFoundError:
+        boards = get_boards_from_file(f"./resources/{args.difficulty}.txt")
+
+    rescan_speed, rescan_scores = measure([RescanBoard.from_masks(board.get_masks()) for board in boards], args, False)
+    incremental_speed, incremental_scores = measure(boards, args, False)
+    hidden_speed, hidden_scores = measure(boards, args, True)
+    print(f"full rescan:            {rescan_speed:10.0f} steps/s, scores {rescan_scores}")
+    print(f"incremental:            {incremental_speed:10.0f} steps/s, scores {incremental_scores}")
+    print(f"incremental + hidden:   {hidden_speed:10.0f} steps/s, scores {hidden_scores}")
+    print(f"speedup: {incremental_speed / rescan_speed:.2f}x, boards identical: {rescan_scores == incremental_scores}")
+
+
+if __name__ == "__main__":
+    main()
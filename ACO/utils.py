@@ -1,7 +1,8 @@
 try:
-    from Board import Board, BOARD_SIZE
+    from Board import Board, VALUE_CHARS
 except ModuleNotFoundError:
-    from ACO.Board import Board, BOARD_SIZE
+    from ACO.Board import Board, VALUE_CHARS
+import math
 
 
 def get_boards_from_file(file_path: str) -> list[Board]:
@@ -14,15 +15,36 @@ def get_boards_from_file(file_path: str) -> list[Board]:
         boards.append(board)
     return boards
 
+
+def parse_board_str(board_str: str) -> list[int]:
+    """Cell values of a board string, 0 for an empty cell.
+
+    A board is either one character per cell, 1-9 then A-Z for values above 9 and "." or "0" for an
+    empty cell, or tokens separated by whitespace or commas, each a decimal value or ".".
+    Anything else raises ValueError naming the invalid characters or tokens.
+    """
+    board_str = board_str.strip()
+    if any(char.isspace() or char == "," for char in board_str):
+        tokens = board_str.replace(",", " ").split()
+        invalid = [token for token in tokens if token != "." and not token.isdecimal()]
+        if invalid:
+            raise ValueError(f"Invalid cells {' '.join(invalid[:5])} in a board of tokens, expected decimal values or \".\"")
+        return [0 if token == "." else int(token) for token in tokens]
+    invalid = sorted({char for char in board_str if char not in ".0" and char.upper() not in VALUE_CHARS})
+    if invalid:
+        raise ValueError(f"Invalid cells {''.join(invalid)!r} in a board string, expected 1-9, A-Z, \".\" or \"0\"")
+    return [0 if char in ".0" else VALUE_CHARS.index(char.upper()) + 1 for char in board_str]
+
+
 def create_board_from_str(board_str: str) -> Board:
+    values = parse_board_str(board_str)
+    size = math.isqrt(len(values))
+    if size * size != len(values) or any(value > size for value in values):
+        raise ValueError(f"A board of {len(values)} cells with values up to {max(values)} is not a square sudoku board")
     board = []
-    for col in range(BOARD_SIZE):
+    for col in range(size):
         board.append([])
-        for row in range(BOARD_SIZE):
-            char = board_str[col * BOARD_SIZE + row]
-            if char == ".":
-                board[col].append(0)
-            else:
-                board[col].append(int(char))
+        for row in range(size):
+            board[col].append(values[col * size + row])
     board = Board(board)
-    return board
\ No newline at end of file
+    return board
@@ -0,0 +1,92 @@
+import json
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator, TextIO
+from corpus import PuzzleCorpus, is_corpus
+from engines import ENGINES, solve_puzzle
+
+
+def iter_puzzles(file: TextIO) -> Iterator[str]:
+    # One puzzle per line, like get_boards_from_file / readBoardsStrsFromFile, but read lazily.
+    for line in file:
+        puzzle = line.strip()
+        if puzzle:
+            yield puzzle
+
+
+def write_results(futures, puzzles: dict, output: TextIO) -> None:
+    # A puzzle that fails gets an error record, like in solve_server.solve_job, instead of ending the run.
+    for future in futures:
+        puzzle = puzzles.pop(future)
+        try:
+            record = future.result()
+        except Exception as error:
+            record = {"puzzle": puzzle, "error": f"{type(error).__name__}: {error}"}
+        output.write(json.dumps(record) + "\n")
+    output.flush()
+
+
+def solve_batch(
+    puzzles: Iterator[str],
+    engine: str,
+    params: dict,
+    workers: int,
+    max_in_flight: int,
+    output: TextIO,
+    prepass: bool = False,
+    verify: bool = False,
+    cache: str | None = None,
+) -> None:
+    """Solves the puzzles in a process pool and writes JSON Lines records in completion order.
+
+    At most max_in_flight puzzles are submitted at once, so memory does not grow with the input size.
+    A puzzle that can not be solved, e.g. a malformed line, gets a {"puzzle": ..., "error": ...} record.
+    """
+    with ProcessPoolExecutor(workers) as executor:
+        pending = set()
+        submitted = {}
+        for puzzle in puzzles:
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write_results(done, submitted, output)
+            future = executor.submit(solve_puzzle, engine, puzzle, params, prepass=prepass, verify=verify, cache=cache)
+            submitted[future] = puzzle
+            pending.add(future)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            write_results(done, submitted, output)
+
+
+def main():
+    parser = ArgumentParser(description="Solve every sudoku board of a file, results are written as JSON Lines")
+    parser.add_argument("input", help="File with one board per line or packed corpus (see corpus.py), - reads from stdin")
+    parser.add_argument("-engine", "--engine", choices=ENGINES, default="aco", help="Solver to use")
+    parser.add_argument("-params", "--params", type=json.loads, default={}, help="Solver parameters as a JSON object")
+    parser.add_argument("-workers", "--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("-inFlight", "--maxInFlight", type=int, default=64, help="Maximum number of boards submitted at once")
+    parser.add_argument("-prepass", "--prepass", action="store_true", help="Try the exact solver for 1 ms before the chosen engine")
+    parser.add_argument("-verify", "--verify", action="store_true", help="Check the solution's validity and the board's uniqueness")
+    parser.add_argument("-cache", "--cache", default=None, help="SQLite solution cache file, answers boards equivalent to solved ones")
+    parser.add_argument("-o", "--output", default=None, help="Output file, stdout by default")
+
+    args = parser.parse_args()
+    output = open(args.output, "w") if args.output else sys.stdout
+    if args.input == "-":
+        input_file = sys.stdin
+    elif is_corpus(args.input):
+        input_file = PuzzleCorpus(args.input)
+    else:
+        input_file = open(args.input, "r")
+    try:
+        puzzles = iter(input_file) if isinstance(input_file, PuzzleCorpus) else iter_puzzles(input_file)
+        solve_batch(puzzles, args.engine, args.params, args.workers, args.maxInFlight, output, args.prepass, args.verify, args.cache)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import json
+import resource
+import statistics
+import sys
+from argparse import ArgumentParser
+from multiprocessing import Pool
+from tabulate import tabulate
+from engines import ENGINES, solve_puzzle
+
+DIFFICULTIES = ("easy", "medium", "hard")
+# Summary metrics compared with the baseline: for all of them but success_rate lower is better.
+COMPARED_METRICS = ("success_rate", "wall_time_median", "evaluations_mean", "peak_rss_kib")
+
+
+def read_puzzles(difficulty: str, limit: int | None = None) -> list[str]:
+    with open(f"resources/{difficulty}.txt", "r") as file:
+        puzzles = [line.strip() for line in file if line.strip()]
+    return puzzles[:limit]
+
+
+def peak_rss_kib() -> int:
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_job(engine: str, difficulty: str, seed: int, params: dict, limit: int | None, prepass: bool) -> dict:
+    """Solves every puzzle of a difficulty with one engine and seed, in a fresh process so its peak RSS is its own."""
+    records = [solve_puzzle(engine, puzzle, params, seed=seed, prepass=prepass) for puzzle in read_puzzles(difficulty, limit)]
+    return {"engine": engine, "difficulty": difficulty, "seed": seed, "peak_rss_kib": peak_rss_kib(), "records": records}
+
+
+def summarize(runs: list[dict]) -> list[dict]:
+    groups = {}
+    for run in runs:
+        groups.setdefault((run["engine"], run["difficulty"]), []).append(run)
+    summary = []
+    for (engine, difficulty), group in groups.items():
+        records = [record for run in group for record in run["records"]]
+        summary.append(
+            {
+                "engine": engine,
+                "difficulty": difficulty,
+                "runs": len(records),
+                "success_rate": sum(record["score"] == 0 for record in records) / len(records),
+                "wall_time_mean": statistics.fmean(record["wall_time"] for record in records),
+                "wall_time_median": statistics.median(record["wall_time"] for record in records),
+                "evaluations_mean": statistics.fmean(record["evaluations"] for record in records),
+                "iterations_mean": statistics.fmean(record["iterations"] for record in records),
+                "peak_rss_kib": max(run["peak_rss_kib"] for run in group),
+            }
+        )
+    return summary
+
+
+def compare(summary: list[dict], baseline: list[dict], tolerance: float) -> list[dict]:
+    """Regressions against the baseline: a cost metric more than tolerance (relative) above it,
+    or a success rate more than tolerance (absolute) below it."""
+    baseline_rows = {(row["engine"], row["difficulty"]): row for row in baseline}
+    regressions = []
+    for row in summary:
+        base = baseline_rows.get((row["engine"], row["difficulty"]))
+        if base is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric == "success_rate":
+                regressed = row[metric] < base[metric] - tolerance
+            else:
+                regressed = row[metric] > base[metric] * (1 + tolerance)
+            if regressed:
+                regressions.append(
+                    {"engine": row["engine"], "difficulty": row["difficulty"], "metric": metric, "baseline": base[metric], "current": row[metric]}
+                )
+    return regressions
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark the engines on the resources boards and compare with a baseline")
+    parser.add_argument("-engines", "--engines", nargs="+", choices=ENGINES, default=list(ENGINES), help="Engines to run")
+    parser.add_argument("-diff", "--difficulties", nargs="+", choices=DIFFICULTIES, default=list(DIFFICULTIES), help="Board files to run")
+    parser.add_argument("-seeds", "--seeds", nargs="+", type=int, default=[0], help="Seeds, every board is solved once per seed")
+    parser.add_argument("-limit", "--limit", type=int, default=None, help="Only the first boards of every file")
+    parser.add_argument("-params", "--params", type=json.loads, default={}, help='Engine parameters as JSON, e.g. {"aco": {"max_iterations": 50}}')
+    parser.add_argument("-prepass", "--prepass", action="store_true", help="Try the exact solver for 1 ms before the chosen engine")
+    parser.add_argument("-workers", "--workers", type=int, default=1, help="Jobs run at once, more than 1 makes the timings noisier")
+    parser.add_argument("-o", "--output", default="bench_results.json", help="Results file")
+    parser.add_argument("-baseline", "--baseline", default=None, help="Results file of an earlier run to compare with")
+    parser.add_argument("-tol", "--tolerance", type=float, default=0.2, help="Allowed slowdown (relative) and success rate drop (absolute)")
+
+    args = parser.parse_args()
+    jobs = [
+        (engine, difficulty, seed, args.params.get(engine, {}), args.limit, args.prepass)
+        for engine in args.engines
+        for difficulty in args.difficulties
+        for seed in args.seeds
+    ]
+    # One job per process, so the peak RSS of an engine is not inherited from the previous one.
+    with Pool(args.workers, maxtasksperchild=1) as pool:
+        runs = pool.starmap(run_job, jobs, chunksize=1)
+    summary = summarize(runs)
+    config = {key: getattr(args, key) for key in ("engines", "difficulties", "seeds", "limit", "params", "prepass")}
+    with open(args.output, "w") as file:
+        json.dump({"config": config, "summary": summary, "runs": runs}, file, indent=1)
+    print(tabulate(summary, headers="keys", floatfmt=".4g"))
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+        if baseline["config"] != config:
+            print(f"Warning: {args.baseline} was run with a different configuration: {baseline['config']}")
+        regressions = compare(summary, baseline["summary"], args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            print(tabulate(regressions, headers="keys", floatfmt=".4g"))
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
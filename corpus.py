@@ -0,0 +1,162 @@
+import itertools
+import math
+from collections import deque
+import mmap
+import os
+import struct
+from argparse import ArgumentParser
+from typing import Iterator
+import numpy as np
+from ACO.Board import VALUE_CHARS
+from ACO.utils import parse_board_str
+
+MAGIC = b"SDKP"
+VERSION = 1
+# magic, version, board size, bits per cell, number of puzzles
+HEADER = struct.Struct("<4sBBBxI")
+# Cell value of every byte of a one character per cell line, 255 for bytes that are not cells.
+CHAR_VALUES = np.full(256, 255, dtype=np.uint8)
+CHAR_VALUES[[ord("."), ord("0")]] = 0
+for _value, _char in enumerate(VALUE_CHARS, start=1):
+    CHAR_VALUES[[ord(_char), ord(_char.lower())]] = _value
+
+
+class PuzzleCorpus:
+    """Memory-mapped packed puzzle file: a header and fixed size records, so puzzle i is at a computed offset.
+
+    9x9 puzzles take a nibble per cell, 41 bytes per puzzle, larger boards a byte per cell. records is
+    a numpy view of the mapped file, nothing is read or decoded until a puzzle is asked for.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.bits, count = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} packed puzzle corpus")
+        self.cells_count = self.size * self.size
+        record_size = _record_size(self.cells_count, self.bits)
+        self.records = np.frombuffer(self.map, dtype=np.uint8, count=count * record_size, offset=HEADER.size).reshape(count, record_size)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def values(self, index: int) -> np.ndarray:
+        """Cell values of puzzle index, row by row, 0 for an empty cell."""
+        record = self.records[index]
+        if self.bits == 8:
+            return record.copy()
+        values = np.empty(2 * len(record), dtype=np.uint8)
+        values[0::2] = record >> 4
+        values[1::2] = record & 0x0F
+        return values[: self.cells_count]
+
+    def __getitem__(self, index: int) -> str:
+        return "".join(VALUE_CHARS[value - 1] if value else "." for value in self.values(index).tolist())
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def close(self) -> None:
+        # The numpy view holds a buffer of the map, it has to go before the map can be closed.
+        self.records = None
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self) -> "PuzzleCorpus":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _record_size(cells_count: int, bits: int) -> int:
+    return (cells_count * bits + 7) // 8
+
+
+def _line_values(line: str) -> np.ndarray:
+    # Lines of one character per cell are translated as bytes, the rarer token lines go through parse_board_str.
+    values = CHAR_VALUES[np.frombuffer(line.strip().encode(), dtype=np.uint8)]
+    if (values == 255).any():
+        values = np.array(parse_board_str(line), dtype=np.uint8)
+    return values
+
+
+def _pack(values: np.ndarray, bits: int) -> bytes:
+    if bits == 8:
+        return values.tobytes()
+    if len(values) % 2:
+        values = np.append(values, np.zeros(1, dtype=np.uint8))
+    return (values[0::2] << 4 | values[1::2]).tobytes()
+
+
+def pack_corpus(text_path: str, corpus_path: str) -> int:
+    """Converts a text file of puzzles, one per line, to a packed corpus and returns the number of puzzles.
+
+    The lines are read and written one at a time, all puzzles have to be of the same size.
+    """
+    count = 0
+    size = bits = None
+    with open(text_path, "r") as text, open(corpus_path, "wb") as corpus:
+        corpus.write(bytes(HEADER.size))
+        for line in text:
+            if not line.strip():
+                continue
+            values = _line_values(line)
+            if size is None:
+                size = math.isqrt(len(values))
+                bits = 4 if size < 16 else 8
+            if len(values) != size * size:
+                raise ValueError(f"Puzzle {count} of {text_path} has {len(values)} cells, the previous ones {size * size}")
+            corpus.write(_pack(values, bits))
+            count += 1
+        corpus.seek(0)
+        corpus.write(HEADER.pack(MAGIC, VERSION, size or 0, bits or 4, count))
+    return count
+
+
+def is_corpus(path: str) -> bool:
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def read_puzzle(path: str, index: int) -> str:
+    """Puzzle index of a packed corpus or of a text file, without parsing the other puzzles.
+
+    A negative index counts from the end like a list's, a text file then keeps only its last -index lines.
+    """
+    if is_corpus(path):
+        with PuzzleCorpus(path) as corpus:
+            return corpus[index]
+    with open(path, "r") as file:
+        if index < 0:
+            tail = deque(file, maxlen=-index)
+            if len(tail) == -index:
+                return tail[0].strip()
+        else:
+            for line in itertools.islice(file, index, None):
+                return line.strip()
+    raise IndexError(f"{path} has no puzzle {index}")
+
+
+def find_puzzle_file(name: str) -> str:
+    """name if it is a file, otherwise resources/{name}.txt seen from a package directory or from the repository root."""
+    for path in (name, f"../resources/{name}.txt", f"./resources/{name}.txt"):
+        if os.path.isfile(path):
+            return path
+    raise FileNotFoundError(f"No puzzle file {name} nor resources/{name}.txt")
+
+
+def main():
+    parser = ArgumentParser(description="Pack a text file of puzzles, one per line, into a memory-mappable corpus")
+    parser.add_argument("input", help="Text file with one board per line")
+    parser.add_argument("output", help="Packed corpus file to write")
+    args = parser.parse_args()
+    count = pack_corpus(args.input, args.output)
+    print(f"Packed {count} puzzles into {args.output} ({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
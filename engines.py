@@ -0,0 +1,155 @@
+import time
+from ACO.Board import BOARD_SIZE
+from ACO.ExactSolver import ExactSolver, is_valid_solution
+from ACO.Solver import Solver
+from ACO.VectorizedSolver import VectorizedSolver
+from ACO.utils import create_board_from_str
+from genethic_algorithm.board import makeBoardsFromFile, boardToStr
+from genethic_algorithm.genethic_algorithm import genethicAlgorithm
+from solution_cache import open_cache
+
+ENGINES = ("aco", "vectorized", "ga", "exact")
+PREPASS_TIME_LIMIT_MS = 1
+
+# Same defaults as ACO_main.py and genethic_main.py, tuning.py races other values against them.
+ACO_PARAMS = {
+    "ants_number": 100,
+    "global_pher_update": 0.9,
+    "local_pher_update": 0.1,
+    "greedines": 0.9,
+    "evaporation_parameter": 0.005,
+    "max_iterations": 200,
+}
+GA_PARAMS = {"pop0Size": 100, "maxIter": 200, "tournamentSize": 50, "crossoverProb": 0.1, "mutationProb": 0.2}
+# Name of the time limit parameter of every engine, in milliseconds.
+TIME_LIMIT_PARAMS = {"aco": "time_limit_ms", "vectorized": "time_limit_ms", "ga": "timeLimitMs", "exact": "time_limit_ms"}
+
+
+def run_engine(engine: str, puzzle: str, params: dict, seed: int | None, prepass: bool) -> tuple[str, int, str, int, int]:
+    """Runs an engine on a puzzle string, returns the engine that solved it, the score, the solution, evaluations and iterations."""
+    if prepass and engine != "exact":
+        score, board, _, evaluations, iterations = ExactSolver(time_limit_ms=PREPASS_TIME_LIMIT_MS).solve(create_board_from_str(puzzle))
+        if score == 0:
+            return "exact", score, board.to_str(), evaluations, iterations
+    if engine == "exact":
+        score, board, _, evaluations, iterations = ExactSolver(**params).solve(create_board_from_str(puzzle))
+        solution = board.to_str()
+    elif engine in ("aco", "vectorized"):
+        aco_params = {**ACO_PARAMS, **params}
+        if engine == "aco":
+            solver = Solver(**aco_params, seed=seed)
+        else:
+            solver = VectorizedSolver(**aco_params, seed=seed)
+        score, board, _, evaluations, iterations = solver.solve(create_board_from_str(puzzle))
+        solution = board.to_str()
+    elif engine == "ga":
+        ga_params = {**GA_PARAMS, **params}
+        pop0_size = ga_params.pop("pop0Size")
+        propagate = ga_params.pop("propagate", False)
+        first_state = 0 if seed is None else seed * pop0_size
+        pop0 = makeBoardsFromFile(
+            puzzle,
+            pop0Size=pop0_size,
+            random_state=list(range(first_state, first_state + pop0_size)),
+            encoding=ga_params.get("encoding", "cells"),
+            propagate=propagate,
+        )
+        score, best_solution, solutions, evaluations = genethicAlgorithm(pop0, seed=seed, **ga_params)
+        solution = boardToStr(best_solution[0])
+        iterations = len(solutions)
+    else:
+        raise ValueError(f"Unknown engine {engine}, expected one of {ENGINES}")
+    return engine, score, solution, evaluations, iterations
+
+
+def _record(puzzle: str, engine: str, score: int, solution: str, evaluations: int, iterations: int, wall_time: float) -> dict:
+    return {
+        "puzzle": puzzle,
+        "engine": engine,
+        "solution": solution,
+        "score": int(score),
+        "iterations": int(iterations),
+        "evaluations": int(evaluations),
+        "wall_time": wall_time,
+    }
+
+
+def solve_puzzle(
+    engine: str,
+    puzzle: str,
+    params: dict | None = None,
+    seed: int | None = None,
+    prepass: bool = False,
+    verify: bool = False,
+    cache: str | None = None,
+) -> dict:
+    """Solves one 81 character puzzle string and returns a JSON serializable record of the run.
+
+    With prepass the exact solver gets PREPASS_TIME_LIMIT_MS first and the metaheuristic only runs if it
+    did not finish. With verify the record also says whether the solution is valid and the puzzle unique.
+    With cache, the path of a SolutionCache, a puzzle equivalent to an already solved one is answered from
+    it without running the engine, and solved puzzles are added to it.
+    """
+    start = time.perf_counter()
+    cached = open_cache(cache).get(puzzle) if cache else None
+    if cached is None:
+        engine, score, solution, evaluations, iterations = run_engine(engine, puzzle, params or {}, seed, prepass)
+    else:
+        score, solution, evaluations, iterations = 0, cached, 0, 0
+    record = _record(puzzle, engine, score, solution, evaluations, iterations, time.perf_counter() - start)
+    if cache:
+        record["cached"] = cached is not None
+        if cached is None and score == 0:
+            open_cache(cache).put(puzzle, solution)
+    if verify:
+        record["valid"] = is_valid_solution(solution, puzzle)
+        record["unique"] = ExactSolver().count_solutions(create_board_from_str(puzzle)) == 1
+    return record
+
+
+def solve_batch(
+    puzzles: list[str],
+    params: dict | None = None,
+    seeds: list[int | None] | None = None,
+    time_limits_ms: list[float | None] | None = None,
+    cache: str | None = None,
+) -> list[dict]:
+    """Solves 9x9 puzzles with one VectorizedSolver.solve_batch, returns a record per puzzle like solve_puzzle.
+
+    A puzzle gets the solution solve_puzzle("vectorized", ...) finds with its seed and time limit, a time
+    limit of None being that of params, and wall_time is that of the whole batch. A puzzle that is not a
+    9x9 board gets a {"puzzle": ..., "error": ...} record instead, the others are solved anyway.
+    """
+    start = time.perf_counter()
+    params = {**ACO_PARAMS, **(params or {})}
+    seeds = seeds if seeds is not None else [None] * len(puzzles)
+    time_limits_ms = time_limits_ms if time_limits_ms is not None else [None] * len(puzzles)
+    records = [None] * len(puzzles)
+    boards = {}
+    for index, puzzle in enumerate(puzzles):
+        cached = open_cache(cache).get(puzzle) if cache else None
+        if cached is not None:
+            records[index] = {**_record(puzzle, "vectorized", 0, cached, 0, 0, time.perf_counter() - start), "cached": True}
+            continue
+        try:
+            board = create_board_from_str(puzzle)
+            if board.layout.size != BOARD_SIZE:
+                raise ValueError(f"VectorizedSolver only solves {BOARD_SIZE}x{BOARD_SIZE} boards")
+        except ValueError as error:
+            records[index] = {"puzzle": puzzle, "error": f"{type(error).__name__}: {error}"}
+            continue
+        boards[index] = board
+    if boards:
+        solver = VectorizedSolver(**params)
+        results = solver.solve_batch(
+            list(boards.values()),
+            [seeds[index] for index in boards],
+            [time_limits_ms[index] if time_limits_ms[index] is not None else solver.time_limit_ms for index in boards],
+        )
+        for index, (score, board, _, evaluations, iterations) in zip(boards, results):
+            records[index] = _record(puzzles[index], "vectorized", score, board.to_str(), evaluations, iterations, time.perf_counter() - start)
+            if cache:
+                records[index]["cached"] = False
+                if score == 0:
+                    open_cache(cache).put(puzzles[index], records[index]["solution"])
+    return records
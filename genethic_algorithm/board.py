@@ -1,5 +1,16 @@
+import math
 import numpy as np
-import random
+import os
+import sys
+from functools import lru_cache
+try:
+    from ACO.Board import Board as PropagationBoard, VALUE_CHARS
+    from ACO.utils import parse_board_str
+except ModuleNotFoundError:
+    # Run as a script from this directory, the ACO package is one level up.
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from ACO.Board import Board as PropagationBoard, VALUE_CHARS
+    from ACO.utils import parse_board_str
 
 
 def readBoardsStrsFromFile(filename: str) -> list[str]:
@@ -15,21 +26,52 @@ def readBoardsStrsFromFile(filename: str) -> list[str]:
         return []
 
 
+def boardRowLength(boardStr: str) -> int:
+    cellsCount = len(parse_board_str(boardStr))
+    rowLength = math.isqrt(cellsCount)
+    if rowLength * rowLength != cellsCount or math.isqrt(rowLength) ** 2 != rowLength:
+        raise ValueError(f"A board of {cellsCount} cells is not a square sudoku board")
+    return rowLength
+
+
+@lru_cache(maxsize=64)
+def propagatedCandidates(boardStr: str) -> tuple[tuple[int, ...], ...]:
+    """Candidate values of every cell of boardStr, in string order, after the ACO Board's propagation of the givens and hidden singles."""
+    values = parse_board_str(boardStr)
+    rowLength = boardRowLength(boardStr)
+    board = PropagationBoard([values[row * rowLength:(row + 1) * rowLength] for row in range(rowLength)])
+    board.propagate_hidden_singles()
+    candidates = tuple(board.layout.mask_values[mask] for mask in board.get_masks())
+    if () in candidates:
+        raise ValueError("Constraint propagation found a cell without candidates, the board has no solution")
+    return candidates
+
+
+def propagatedBoardStr(boardStr: str) -> str:
+    # The board with every cell that propagation left a single candidate for given.
+    return "".join(VALUE_CHARS[values[0] - 1] if len(values) == 1 else "." for values in propagatedCandidates(boardStr))
+
+
 def InitiallFilling(boardStr: str, board: np.matrix, boardMask: np.matrix, rowLength: int) -> None:
     rowIndex = 0
     columnIndex = 0
-    for char in boardStr:
+    for value in parse_board_str(boardStr):
         if rowIndex == rowLength:
             rowIndex = 0
             columnIndex += 1
-        if char == ".":
+        if value == 0:
             boardMask[rowIndex, columnIndex] = False
         else:
-            board[rowIndex, columnIndex] = int(char)
+            board[rowIndex, columnIndex] = value
             boardMask[rowIndex, columnIndex] = True
         rowIndex += 1
 
 
+def boardToStr(board: np.matrix) -> str:
+    # InitiallFilling fills the board column by column, so the string is read back the same way.
+    return "".join(VALUE_CHARS[number - 1] if number else "." for number in np.asarray(board).T.flat)
+
+
 def makeNumbersToUse(numbersToUse: list, board: np.matrix, rowLength: int) -> None:
     for repetition in range(rowLength):
         for number in range(rowLength):
@@ -40,36 +82,92 @@ def makeNumbersToUse(numbersToUse: list, board: np.matrix, rowLength: int) -> No
                 numbersToUse.remove(board[rowIndex, columnIndex])
 
 
-def FillBoard(board: np.matrix, numbersToUse: list[int], random_state: int) -> None:
-    random.seed(random_state)
+def FillBoard(
+    board: np.matrix, numbersToUse: list[int], random_state: int | np.random.Generator, candidates: tuple[tuple[int, ...], ...] = None
+) -> None:
+    """Fills the empty cells with numbersToUse, with candidates (in string order) only with a cell's candidates while any are left.
+
+    random_state seeds a generator of its own (or is one), the uniform numbers of all cells are drawn at once.
+    """
+    draws = iter(np.random.default_rng(random_state).random(int((board == 0).sum())).tolist())
     for rowIndex in range(board.shape[0]):
         for columnIndex in range(board.shape[1]):
             if board[rowIndex, columnIndex] == 0:
-                chosenNumber = random.choice(numbersToUse)
+                allowed = numbersToUse
+                if candidates is not None:
+                    # InitiallFilling fills the board column by column, so the string index is column-major.
+                    cellCandidates = candidates[columnIndex * board.shape[0] + rowIndex]
+                    allowed = [number for number in numbersToUse if number in cellCandidates] or numbersToUse
+                chosenNumber = allowed[int(next(draws) * len(allowed))]
                 board[rowIndex, columnIndex] = chosenNumber
                 numbersToUse.remove(chosenNumber)
-    random.seed(None)
 
 
-def makeBoardFromFile(boardStr: str, rowLength: int = 9, columnLength: int = 9, random_state: int = 42) -> tuple[np.matrix, np.matrix]:
+def FillRows(board: np.matrix, random_state: int | np.random.Generator, candidates: tuple[tuple[int, ...], ...] = None) -> None:
+    # Every row gets its missing numbers in random order, so each row is a permutation keeping the givens.
+    # With candidates a cell takes one of its candidates among the missing numbers, if any is left.
+    draws = iter(np.random.default_rng(random_state).random(int((board == 0).sum())).tolist())
+    for rowIndex in range(board.shape[0]):
+        row = board[rowIndex].tolist()[0]
+        missing = [number for number in range(1, len(row) + 1) if number not in row]
+        for columnIndex in range(board.shape[1]):
+            if board[rowIndex, columnIndex] == 0:
+                allowed = missing
+                if candidates is not None:
+                    cellCandidates = candidates[columnIndex * board.shape[0] + rowIndex]
+                    allowed = [number for number in missing if number in cellCandidates] or missing
+                chosenNumber = allowed[int(next(draws) * len(allowed))]
+                missing.remove(chosenNumber)
+                board[rowIndex, columnIndex] = chosenNumber
+
+
+def makeBoardFromFile(
+    boardStr: str,
+    rowLength: int = None,
+    columnLength: int = None,
+    random_state: int | np.random.Generator = 42,
+    encoding: str = "cells",
+    propagate: bool = False,
+) -> tuple[np.matrix, np.matrix]:
+    """The board size is taken from boardStr unless given, 9x9 for the files in resources.
+
+    With propagate the cells fixed by propagatedCandidates are given (in the mask) too, and the
+    other cells are filled from their candidates where the remaining numbers allow it.
+    """
+    rowLength = rowLength or boardRowLength(boardStr)
+    columnLength = columnLength or rowLength
+    candidates = propagatedCandidates(boardStr) if propagate else None
+    if propagate:
+        boardStr = propagatedBoardStr(boardStr)
     board = np.matrix(np.zeros((rowLength, columnLength)), dtype=int)
     boardMask = np.matrix(np.zeros((rowLength, columnLength)), dtype=bool)
-    numbersToUse = []
     InitiallFilling(boardStr, board, boardMask, rowLength)
-    makeNumbersToUse(numbersToUse, board, rowLength)
-    FillBoard(board, numbersToUse, random_state)
+    if encoding == "rows":
+        FillRows(board, random_state, candidates)
+    else:
+        numbersToUse = []
+        makeNumbersToUse(numbersToUse, board, rowLength)
+        FillBoard(board, numbersToUse, random_state, candidates)
     return board, boardMask
 
 
 def makeBoardsFromFile(
-    boardStr: str, rowLength: int = 9, columnLength: int = 9, pop0Size: int = 40, random_state: list[int] or None = None
+    boardStr: str,
+    rowLength: int = None,
+    columnLength: int = None,
+    pop0Size: int = 40,
+    random_state: list[int] or None = None,
+    encoding: str = "cells",
+    propagate: bool = False,
 ) -> list[(np.matrix, np.matrix)]:
     boardsMasks = []
     for number in range(pop0Size):
         if random_state:
-            board, boardMask = makeBoardFromFile(boardStr, random_state=random_state.pop(0))
+            board, boardMask = makeBoardFromFile(
+                boardStr, rowLength, columnLength, random_state=random_state.pop(0), encoding=encoding, propagate=propagate
+            )
         else:
-            board, boardMask = makeBoardFromFile(boardStr, random_state=random_state)
+            board, boardMask = makeBoardFromFile(boardStr, rowLength, columnLength, random_state=random_state, encoding=encoding, propagate=propagate)
         boardsMasks.append((board, boardMask))
     return boardsMasks
 
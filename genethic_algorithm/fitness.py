@@ -0,0 +1,73 @@
+import math
+import numpy as np
+try:
+    from population import Population
+except ModuleNotFoundError:
+    from genethic_algorithm.population import Population
+
+
+def cellUnits(rowLength: int) -> np.ndarray:
+    """(cells, 3) array of the row, column and block unit of every cell, units numbered rows, columns, blocks."""
+    blockSize = math.isqrt(rowLength)
+    rows, columns = np.divmod(np.arange(rowLength * rowLength), rowLength)
+    blocks = (rows // blockSize) * blockSize + columns // blockSize
+    return np.stack((rows, rowLength + columns, 2 * rowLength + blocks), axis=1)
+
+
+class UnitCounts:
+    """Digit counts of every row, column and block of every individual, kept in sync with the boards.
+
+    q of a board is the sum over its units of count - 1 for every digit present, so a swap of two
+    cells only changes the counts of the units of those two cells and its score delta is O(1).
+    The boards of the population are updated in place by swap().
+    """
+
+    def __init__(self, population: Population) -> None:
+        self.population = population
+        self.rowLength = population.rowLength
+        self.units = cellUnits(self.rowLength)
+        popSize, cells = population.boards.shape
+        unitsCount = 3 * self.rowLength
+        individuals = np.arange(popSize)[:, None, None]
+        flat = (individuals * unitsCount + self.units[None, :, :]) * (self.rowLength + 1) + population.boards[:, :, None]
+        counts = np.bincount(flat.reshape(-1), minlength=popSize * unitsCount * (self.rowLength + 1))
+        self.counts = counts.reshape(popSize, unitsCount, self.rowLength + 1).astype(np.int16)
+        self.scores = np.maximum(self.counts[:, :, 1:] - 1, 0).sum(axis=(1, 2))
+
+    def swapDeltas(self, individuals: np.ndarray, cells1: np.ndarray, cells2: np.ndarray) -> np.ndarray:
+        """Score change of swapping cells1 and cells2 in the given individuals, at most one swap per individual."""
+        boards = self.population.boards
+        values1 = boards[individuals, cells1]
+        values2 = boards[individuals, cells2]
+        units1 = self.units[cells1]
+        units2 = self.units[cells2]
+        deltas = np.zeros(len(individuals), dtype=np.int64)
+        for kind in range(3):
+            unit1, unit2 = units1[:, kind], units2[:, kind]
+            # A unit holding both cells keeps the same digits.
+            moved = unit1 != unit2
+            deltas -= moved & (self.counts[individuals, unit1, values1] >= 2)
+            deltas += moved & (self.counts[individuals, unit1, values2] >= 1)
+            deltas -= moved & (self.counts[individuals, unit2, values2] >= 2)
+            deltas += moved & (self.counts[individuals, unit2, values1] >= 1)
+        return np.where(values1 == values2, 0, deltas)
+
+    def swap(self, individuals: np.ndarray, cells1: np.ndarray, cells2: np.ndarray, deltas: np.ndarray | None = None) -> None:
+        """Swaps the cells, at most one swap per individual, and updates the counts and scores."""
+        if deltas is None:
+            deltas = self.swapDeltas(individuals, cells1, cells2)
+        boards = self.population.boards
+        values1 = boards[individuals, cells1]
+        values2 = boards[individuals, cells2]
+        units1 = self.units[cells1]
+        units2 = self.units[cells2]
+        for kind in range(3):
+            unit1, unit2 = units1[:, kind], units2[:, kind]
+            moved = (unit1 != unit2).astype(np.int16)
+            self.counts[individuals, unit1, values1] -= moved
+            self.counts[individuals, unit1, values2] += moved
+            self.counts[individuals, unit2, values2] -= moved
+            self.counts[individuals, unit2, values1] += moved
+        boards[individuals, cells1] = values2
+        boards[individuals, cells2] = values1
+        self.scores[individuals] += deltas
@@ -0,0 +1,72 @@
+from argparse import ArgumentParser
+from fitness import UnitCounts
+from genethic_algorithm import q, qBatch
+from population import Population
+import numpy as np
+import time
+
+
+def randomPopulation(rowLength: int, popSize: int, rng: np.random.Generator) -> Population:
+    # Every digit used rowLength times, as after FillBoard, with no givens.
+    boards = rng.permuted(np.tile(np.repeat(np.arange(1, rowLength + 1, dtype=np.uint8), rowLength), (popSize, 1)), axis=1)
+    return Population(boards, np.zeros(rowLength * rowLength, dtype=bool), rowLength)
+
+
+def randomSwaps(population: Population, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    cells = population.boards.shape[1]
+    return rng.integers(0, cells, size=len(population)), rng.integers(0, cells, size=len(population))
+
+
+def measure(rowLength: int, popSize: int, swaps: int, seed: int) -> dict[str, float]:
+    """Evaluations per second of scoring one swap per individual with q, qBatch and UnitCounts."""
+    rng = np.random.default_rng(seed)
+    population = randomPopulation(rowLength, popSize, rng)
+    individuals = np.arange(popSize)
+    speeds = {}
+
+    if rowLength == 9:
+        start = time.perf_counter()
+        for _ in range(max(swaps // 10, 1)):
+            cells1, cells2 = randomSwaps(population, rng)
+            population.boards[individuals, cells1], population.boards[individuals, cells2] = (
+                population.boards[individuals, cells2],
+                population.boards[individuals, cells1],
+            )
+            for boardTuple in population.toTuples():
+                q(boardTuple)
+        speeds["q"] = max(swaps // 10, 1) * popSize / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(swaps):
+        cells1, cells2 = randomSwaps(population, rng)
+        population.boards[individuals, cells1], population.boards[individuals, cells2] = (
+            population.boards[individuals, cells2],
+            population.boards[individuals, cells1],
+        )
+        qBatch(population.grids())
+    speeds["qBatch"] = swaps * popSize / (time.perf_counter() - start)
+
+    counts = UnitCounts(population)
+    start = time.perf_counter()
+    for _ in range(swaps):
+        cells1, cells2 = randomSwaps(population, rng)
+        counts.swap(individuals, cells1, cells2)
+    speeds["delta"] = swaps * popSize / (time.perf_counter() - start)
+    assert (counts.scores == qBatch(population.grids())).all()
+    return speeds
+
+
+def main():
+    parser = ArgumentParser(description="Fitness evaluations per second of full and incremental scoring")
+    parser.add_argument("-pop", "--popSize", type=int, default=100, help="Population size")
+    parser.add_argument("-swaps", "--swaps", type=int, default=200, help="Swaps per individual")
+    parser.add_argument("-seed", "--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    for rowLength in (9, 16, 25):
+        speeds = measure(rowLength, args.popSize, args.swaps, args.seed)
+        line = ", ".join(f"{name} {speed:10.0f} evals/s" for name, speed in speeds.items())
+        print(f"{rowLength}x{rowLength}: {line}, delta vs qBatch {speeds['delta'] / speeds['qBatch']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
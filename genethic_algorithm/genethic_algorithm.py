@@ -1,6 +1,14 @@
 import numpy as np
 import math
+import time
 from copy import deepcopy
+from typing import Iterator, NamedTuple
+try:
+    from fitness import UnitCounts
+    from population import Population
+except ModuleNotFoundError:
+    from genethic_algorithm.fitness import UnitCounts
+    from genethic_algorithm.population import Population
 
 
 def makePairs(pop: list[(np.matrix, np.matrix)]) -> list[((np.matrix, np.matrix), (np.matrix, np.matrix))]:
@@ -18,13 +26,14 @@ def q(cell: tuple[np.matrix, np.matrix]) -> int:
     for row in cell[0]:
         invalid += len(row.tolist()[0]) - len(set(row.tolist()[0]))
     for columnIndex in range(cell[0].shape[1]):
-        column = cell[0][:, columnIndex]
+        column = cell[0][:, columnIndex].T
         invalid += len(column.tolist()[0]) - len(set(column.tolist()[0]))
-    rowIndices = (3, 6, 9)
-    columnIndices = (3, 6, 9)
+    blockSize = math.isqrt(cell[0].shape[0])
+    rowIndices = range(blockSize, cell[0].shape[0] + 1, blockSize)
+    columnIndices = range(blockSize, cell[0].shape[1] + 1, blockSize)
     prevRowIndice = 0
-    prevColumnIndice = 0
     for rowIndice in rowIndices:
+        prevColumnIndice = 0
         for columnIndice in columnIndices:
             matrix = cell[0][prevRowIndice:rowIndice, prevColumnIndice:columnIndice]
             matrixValues = list(matrix.flat)
@@ -34,52 +43,76 @@ def q(cell: tuple[np.matrix, np.matrix]) -> int:
     return invalid
 
 
+def qBatch(boards: np.ndarray, checkRows: bool = True) -> np.ndarray:
+    """Scores a (pop, 9, 9) stack of boards at once, element i is q of board i.
+
+    For every value a one-hot slice of the boards gives the rows, columns and blocks containing it,
+    q is the number of cells minus the number of distinct values present in each unit. Rows are
+    skipped with checkRows=False, for boards whose rows are permutations by construction.
+    """
+    popSize, size = boards.shape[0], boards.shape[1]
+    blockSize = math.isqrt(size)
+    unitsCount = 3 if checkRows else 2
+    present = np.zeros(popSize, dtype=np.int64)
+    for value in range(1, size + 1):
+        oneHot = boards == value
+        if checkRows:
+            present += oneHot.any(axis=2).sum(axis=1)
+        present += oneHot.any(axis=1).sum(axis=1)
+        present += oneHot.reshape(popSize, blockSize, blockSize, blockSize, blockSize).any(axis=(2, 4)).sum(axis=(1, 2))
+    return unitsCount * size * size - present
+
+
 def calculateProb(popSize: int, tournamentSize: int, rank: int) -> float:
     return (1 / math.pow(popSize, tournamentSize)) * (math.pow(popSize - rank + 1, tournamentSize) - math.pow(popSize - rank, tournamentSize))
 
 
-def getProbabilities(pop: list[(np.matrix, np.matrix)], tournamentSize: int = 2, sort: bool = True) -> list[float]:
+def getProbabilities(pop: list[(np.matrix, np.matrix)], tournamentSize: int = 2, sort: bool = True, q=q) -> list[float]:
     if sort:
         sortedPop = sorted(pop, key=q)
     else:
         sortedPop = pop
-    calculated = []
-    probabilities = []
-    rank = 0
-    popSize = len(sortedPop)
-    for boardTuple in sortedPop:
-        if boardTuple[0].tolist() not in calculated:
-            rank += 1
-            probabilities.append(calculateProb(popSize, tournamentSize, rank))
-            calculated.append(boardTuple[0].tolist())
-        else:
-            probabilities.append(calculateProb(popSize, tournamentSize, rank))
-    return probabilities
+    boards = np.stack([np.asarray(boardTuple[0], dtype=np.uint8).reshape(-1) for boardTuple in sortedPop])
+    return rankProbabilities(boardRanks(boards), tournamentSize).tolist()
 
 
-def tournamentSelection(pop: list[(np.matrix, np.matrix)], tournamentSize: int = 2, seed: int = None) -> list[(np.matrix, np.matrix)]:
+def listOperator(operator):
+    """Marks operator as working on lists of (board, mask) tuples with the call shapes the GA had before Population.
+
+    Those are selection(pop, tournamentSize, q=q), crossover(pop, crossoverProb) and mutation(pop, mutationProb),
+    iterateGenethicAlgorithm converts the population for marked operators. They draw from their own
+    random streams, so a seeded run using them is not reproducible.
+    """
+    operator.listOperator = True
+    return operator
+
+
+@listOperator
+def tournamentSelection(
+    pop: list[(np.matrix, np.matrix)], tournamentSize: int = 2, seed: int | np.random.Generator = None, q=q
+) -> list[(np.matrix, np.matrix)]:
     selected = []
     sortedPop = sorted(pop, key=q)
     probs = np.asarray(getProbabilities(sortedPop, tournamentSize, sort=False)).astype("float64")
     probs = probs / np.sum(probs)
-    indexList = [index for index in range(len(sortedPop))]
-    if seed:
-        np.random.seed(seed)
-    tournamentIndexes = np.random.choice(indexList, size=len(sortedPop), replace=True, p=probs)
+    tournamentIndexes = np.random.default_rng(seed).choice(len(sortedPop), size=len(sortedPop), replace=True, p=probs)
     selected = [sortedPop[index] for index in tournamentIndexes]
     return selected
 
 
+@listOperator
 def crossover(pop: list[(np.matrix, np.matrix)], crossoverProb: float = 0.5, seeds: list[int] = None) -> list[(np.matrix, np.matrix)]:
     pairs = makePairs(pop)
     crossed = []
     if seeds and len(seeds) < len(pairs):
         return []
+    # Without seeds all pairs draw from one generator instead of one each.
+    rng = np.random.default_rng()
     for index, pair in enumerate(pairs):
         if seeds:
             boardTuple1, boardTuple2 = singleCrossoverOperation(pair[0], pair[1], crossoverProb, seeds[index])
         else:
-            boardTuple1, boardTuple2 = singleCrossoverOperation(pair[0], pair[1], crossoverProb, None)
+            boardTuple1, boardTuple2 = singleCrossoverOperation(pair[0], pair[1], crossoverProb, rng)
         crossed.append(boardTuple1)
         crossed.append(boardTuple2)
     if len(pop) % 2 != 0:
@@ -87,15 +120,16 @@ def crossover(pop: list[(np.matrix, np.matrix)], crossoverProb: float = 0.5, see
     return crossed
 
 
-def singleCrossoverOperation(boardTuple1: (np.matrix, np.matrix), boardTuple2: (np.matrix, np.matrix), crossoverProb: float, seed: int) -> list[(np.matrix, np.matrix), (np.matrix, np.matrix)]:
-    if seed:
-        np.random.seed(seed)
-    if np.random.rand() < crossoverProb:
+def singleCrossoverOperation(
+    boardTuple1: (np.matrix, np.matrix), boardTuple2: (np.matrix, np.matrix), crossoverProb: float, seed: int | np.random.Generator
+) -> list[(np.matrix, np.matrix), (np.matrix, np.matrix)]:
+    rng = np.random.default_rng(seed)
+    if rng.random() < crossoverProb:
         newBoard1 = deepcopy(boardTuple1[0])
         newBoardMask1 = deepcopy(boardTuple1[1])
         newBoard2 = deepcopy(boardTuple2[0])
         newBoardMask2 = deepcopy(boardTuple2[1])
-        crossoverPoint = np.random.randint(0, newBoard1.shape[0])
+        crossoverPoint = rng.integers(0, newBoard1.shape[0])
         board1Rows = newBoard1[:crossoverPoint, :]
         board1Mask = newBoardMask1[:crossoverPoint, :]
         board2Rows = newBoard2[crossoverPoint:, :]
@@ -108,20 +142,25 @@ def singleCrossoverOperation(boardTuple1: (np.matrix, np.matrix), boardTuple2: (
     return [boardTuple1, boardTuple2]
 
 
+@listOperator
 def mutation(pop: list[(np.matrix, np.matrix)], mutationProb: float = 0.5, seeds: list[int] = None) -> list[(np.matrix, np.matrix)]:
     mutated = []
     if seeds and len(seeds) < len(pop):
         return []
+    rng = np.random.default_rng()
     for index, boardTuple in enumerate(pop):
         if seeds:
             newBoardTuple = singleMutationOperation(boardTuple[0], boardTuple[1], mutationProb, seeds[index])
         else:
-            newBoardTuple = singleMutationOperation(boardTuple[0], boardTuple[1], mutationProb, None)
+            newBoardTuple = singleMutationOperation(boardTuple[0], boardTuple[1], mutationProb, rng)
         mutated.append(newBoardTuple)
     return mutated
 
 
-def singleMutationOperation(board: np.matrix, boardMask: np.matrix, mutationProb: float, seed: int) -> tuple[np.matrix, np.matrix]:
+def singleMutationOperation(board: np.matrix, boardMask: np.matrix, mutationProb: float, seed: int | np.random.Generator) -> tuple[np.matrix, np.matrix]:
+    # Each of the len(validIndexes) / 2 attempts happens with mutationProb and swaps two cells no earlier
+    # swap touched: the attempts and one permutation of the free cells are drawn at once, the swaps take
+    # consecutive pairs of it.
     mutatedBoard = deepcopy(board)
     mutatedBoardMask = deepcopy(boardMask)
     validIndexes = []
@@ -130,59 +169,321 @@ def singleMutationOperation(board: np.matrix, boardMask: np.matrix, mutationProb
             if not mutatedBoardMask[row, column]:
                 validIndexes.append((row, column))
     if len(validIndexes) >= 2:
-        indexList = [index for index in range(len(validIndexes))]
+        rng = np.random.default_rng(seed)
         maxMutations = int(len(validIndexes) / 2)
-        for mutationNumber in range(maxMutations):
-            if seed:
-                np.random.seed(seed)
-                seed = np.random.randint(1, 100)
-            if np.random.rand() < mutationProb:
-                index1, index2 = np.random.choice(indexList, size=2, replace=False)
-                indexList.remove(index1)
-                indexList.remove(index2)
-                index1 = validIndexes[index1]
-                index2 = validIndexes[index2]
-                mutatedBoard[index1[0], index1[1]], mutatedBoard[index2[0], index2[1]] = (
-                    mutatedBoard[index2[0], index2[1]],
-                    mutatedBoard[index1[0], index1[1]],
-                )
+        mutationsCount = int((rng.random(maxMutations) < mutationProb).sum())
+        order = rng.permutation(len(validIndexes))[: 2 * mutationsCount].tolist()
+        for index1, index2 in zip(order[0::2], order[1::2]):
+            index1 = validIndexes[index1]
+            index2 = validIndexes[index2]
+            mutatedBoard[index1[0], index1[1]], mutatedBoard[index2[0], index2[1]] = (
+                mutatedBoard[index2[0], index2[1]],
+                mutatedBoard[index1[0], index1[1]],
+            )
     return (mutatedBoard, mutatedBoardMask)
 
 
-def genethicAlgorithm(
-    pop0: list[(np.matrix, np.matrix)],
+def boardRanks(boards: np.ndarray) -> np.ndarray:
+    """Rank of every row of a sorted (pop, cells) uint8 array: the number of distinct boards up to and including it.
+
+    Each board is viewed as one fixed size bytes key, np.unique sorts the keys and gives the first
+    occurrence of every distinct board, so duplicates are found in O(n log n).
+    """
+    keys = np.ascontiguousarray(boards).view(np.dtype((np.void, boards.shape[1] * boards.itemsize))).reshape(-1)
+    _, firstIndexes = np.unique(keys, return_index=True)
+    isFirst = np.zeros(len(boards), dtype=bool)
+    isFirst[firstIndexes] = True
+    return np.cumsum(isFirst)
+
+
+def rankProbabilities(ranks: np.ndarray, tournamentSize: int) -> np.ndarray:
+    # calculateProb for every rank, divided by popSize ** tournamentSize term by term so large populations do not overflow.
+    popSize = len(ranks)
+    return np.power((popSize - ranks + 1) / popSize, tournamentSize) - np.power((popSize - ranks) / popSize, tournamentSize)
+
+
+def populationTournamentSelection(population: Population, scores: np.ndarray, tournamentSize: int, rng: np.random.Generator) -> Population:
+    order = np.argsort(scores, kind="stable")
+    ranks = boardRanks(population.boards[order])
+    popSize = len(population)
+    probs = rankProbabilities(ranks, tournamentSize)
+    probs = probs / np.sum(probs)
+    return population.take(order[rng.choice(popSize, size=popSize, replace=True, p=probs)])
+
+
+def populationCrossover(population: Population, crossoverProb: float, rng: np.random.Generator) -> Population:
+    """One point crossover of consecutive pairs, the point being a row boundary as in singleCrossoverOperation.
+
+    An odd last individual is paired with the one before it and only its first child is kept, like crossover().
+    """
+    popSize = len(population)
+    firsts = np.arange(0, popSize, 2)
+    seconds = firsts + 1
+    if popSize % 2:
+        firsts[-1], seconds[-1] = popSize - 2, popSize - 1
+    points = np.where(rng.random(len(firsts)) < crossoverProb, rng.integers(0, population.rowLength, size=len(firsts)), 0)
+    rowLength = population.rowLength
+    tails = (np.arange(rowLength) >= points[:, None])[:, :, None]
+    crossed = np.empty((2 * len(firsts), population.boards.shape[1]), dtype=population.boards.dtype)
+    crossed[0::2], crossed[1::2] = population.boards[firsts], population.boards[seconds]
+    rows1, rows2 = (children.reshape(len(firsts), rowLength, rowLength) for children in (crossed[0::2], crossed[1::2]))
+    np.copyto(rows1, population.boards[seconds].reshape(rows1.shape), where=tails)
+    np.copyto(rows2, population.boards[firsts].reshape(rows2.shape), where=tails)
+    return population.withBoards(crossed[:popSize])
+
+
+def populationMutation(population: Population, mutationProb: float, rng: np.random.Generator) -> Population:
+    """Swaps disjoint pairs of free cells, each of the len(free) // 2 possible swaps happening with mutationProb."""
+    boards = population.boards.copy()
+    freeIndexes = population.freeIndexes
+    maxMutations = len(freeIndexes) // 2
+    if maxMutations == 0:
+        return population.withBoards(boards)
+    popSize = len(population)
+    # The smallest dtype holding every free cell position, uint8 would wrap above 255 free cells on 25x25 boards.
+    positions = np.arange(len(freeIndexes), dtype=np.min_scalar_type(len(freeIndexes) - 1))
+    shuffled = rng.permuted(np.tile(positions, (popSize, 1)), axis=1)
+    pairs = shuffled[:, : 2 * maxMutations].reshape(popSize, maxMutations, 2)
+    active = rng.random((popSize, maxMutations)) < mutationProb
+    individuals = np.broadcast_to(np.arange(popSize)[:, None], active.shape)[active]
+    cells1 = freeIndexes[pairs[..., 0][active]]
+    cells2 = freeIndexes[pairs[..., 1][active]]
+    values1 = boards[individuals, cells1]
+    boards[individuals, cells1] = boards[individuals, cells2]
+    boards[individuals, cells2] = values1
+    return population.withBoards(boards)
+
+
+def rowFreeCells(population: Population) -> tuple[np.ndarray, np.ndarray]:
+    # Free cell indexes of every row, padded with the row's first cell where the row has fewer free cells, and their counts.
+    rowLength = population.rowLength
+    freeMask = ~population.mask.reshape(rowLength, rowLength)
+    rowFree = np.argsort(~freeMask, axis=1, kind="stable") + np.arange(0, rowLength * rowLength, rowLength)[:, None]
+    return rowFree, freeMask.sum(axis=1)
+
+
+def populationRowMutation(population: Population, mutationProb: float, rng: np.random.Generator) -> Population:
+    """Swaps two free cells of the same row, in every row with at least two free cells with mutationProb.
+
+    Rows that are permutations stay permutations, which is what the "rows" encoding relies on.
+    """
+    boards = population.boards.copy()
+    rowLength = population.rowLength
+    rowFree, freeCounts = rowFreeCells(population)
+    popSize = len(population)
+    active = (rng.random((popSize, rowLength)) < mutationProb) & (freeCounts >= 2)
+    firsts = (rng.random((popSize, rowLength)) * freeCounts).astype(np.intp)
+    seconds = (firsts + 1 + (rng.random((popSize, rowLength)) * np.maximum(freeCounts - 1, 1)).astype(np.intp)) % np.maximum(freeCounts, 1)
+    individuals, rows = np.nonzero(active)
+    cells1 = rowFree[rows, firsts[active]]
+    cells2 = rowFree[rows, seconds[active]]
+    values1 = boards[individuals, cells1]
+    boards[individuals, cells1] = boards[individuals, cells2]
+    boards[individuals, cells2] = values1
+    return population.withBoards(boards)
+
+
+def populationHillClimb(counts: UnitCounts, steps: int, rng: np.random.Generator, encoding: str = "cells") -> None:
+    """Proposes one swap of free cells per individual and step, kept when it does not make the score worse.
+
+    Swaps are scored with counts.swapDeltas, so a step costs O(1) per individual instead of a full q.
+    With encoding="rows" both cells are taken from one row, so rows stay permutations.
+    """
+    population = counts.population
+    popSize = len(population)
+    if encoding == "rows":
+        rowFree, freeCounts = rowFreeCells(population)
+        rows = np.flatnonzero(freeCounts >= 2)
+        if len(rows) == 0:
+            return
+        choices, sizes = rowFree[rows], freeCounts[rows]
+    else:
+        if len(population.freeIndexes) < 2:
+            return
+        choices, sizes = population.freeIndexes[None, :], np.array([len(population.freeIndexes)])
+    individuals = np.arange(popSize)
+    for _ in range(steps):
+        groups = rng.integers(0, len(sizes), size=popSize)
+        groupSizes = sizes[groups]
+        firsts = (rng.random(popSize) * groupSizes).astype(np.intp)
+        seconds = (firsts + 1 + (rng.random(popSize) * (groupSizes - 1)).astype(np.intp)) % groupSizes
+        cells1, cells2 = choices[groups, firsts], choices[groups, seconds]
+        deltas = counts.swapDeltas(individuals, cells1, cells2)
+        accepted = deltas <= 0
+        counts.swap(individuals[accepted], cells1[accepted], cells2[accepted], deltas[accepted])
+
+
+ENCODINGS = ("cells", "rows")
+
+
+def adaptListOperators(selection, crossover, mutation, q=None) -> tuple:
+    # Wraps every operator marked with listOperator into the population operator call shape.
+    def populationOf(population: Population, pop: list[(np.matrix, np.matrix)]) -> Population:
+        return population.withBoards(Population.fromTuples(pop).boards)
+
+    if getattr(selection, "listOperator", False):
+        listSelection = selection
+        qArgument = {} if q is None else {"q": q}
+
+        def selection(population: Population, scores: np.ndarray, tournamentSize: int, rng: np.random.Generator) -> Population:
+            return populationOf(population, listSelection(population.toTuples(), tournamentSize, **qArgument))
+
+    if getattr(crossover, "listOperator", False):
+        listCrossover = crossover
+
+        def crossover(population: Population, crossoverProb: float, rng: np.random.Generator) -> Population:
+            return populationOf(population, listCrossover(population.toTuples(), crossoverProb))
+
+    if getattr(mutation, "listOperator", False):
+        listMutation = mutation
+
+        def mutation(population: Population, mutationProb: float, rng: np.random.Generator) -> Population:
+            return populationOf(population, listMutation(population.toTuples(), mutationProb))
+
+    return selection, crossover, mutation
+
+
+def encodingMutation(encoding: str):
+    # Default mutation of every encoding, populationCrossover only cuts between rows so it preserves both.
+    return populationRowMutation if encoding == "rows" else populationMutation
+
+
+class Progress(NamedTuple):
+    """Snapshot yielded by iterateGenethicAlgorithm, once before the first generation and after every generation.
+
+    sollutions is a tuple copy of the best score of every generation so far, so stored snapshots do not change.
+    """
+
+    iteration: int
+    bestScore: int
+    bestSollution: tuple[np.matrix, np.matrix]
+    sollutions: tuple[int, ...]
+    evaluations: int
+    elapsed: float
+
+
+def iterateGenethicAlgorithm(
+    pop0: list[(np.matrix, np.matrix)] | Population,
     maxIter: int = 200,
     tournamentSize: int = 2,
     crossoverProb: float = 0.5,
     mutationProb: float = 0.5,
     maxEvaluations: int = float("inf"),
-    selection=tournamentSelection,
-    crossover=crossover,
-    mutation=mutation,
+    selection=None,
+    crossover=None,
+    mutation=None,
     optimization=min,
-    q=q,
-) -> tuple[int, (np.matrix, np.matrix), list[int]]:
+    q=None,
+    seed: int = None,
+    encoding: str = "cells",
+    hillClimbSteps: int = 0,
+    migration=None,
+    timeLimitMs: float | None = None,
+    stopEvent=None,
+) -> Iterator[Progress]:
+    """Runs the GA on a Population, a list of (board, mask) tuples is converted to one, yielding its Progress.
+
+    Selection, crossover and mutation default to the population operators, list operators marked with
+    listOperator (tournamentSelection, crossover and mutation) are adapted to them.
+    Every generation is scored once, by default with qBatch, and the scores are passed on to selection.
+    The best solution is returned as a (board, mask) tuple of np.matrix like the population operators expect.
+    With encoding="rows" pop0 has to be made with makeBoardsFromFile(..., encoding="rows"): every row stays
+    a permutation, mutation swaps within rows and only columns and blocks are scored.
+    With hillClimbSteps every mutated individual also gets that many populationHillClimb steps, each
+    step counting as one evaluation per individual.
+    migration(iteration, population, scores) is called after every generation and returns the population
+    and scores to continue with and whether to stop, the island model uses it to exchange individuals.
+    The run also stops after the generation during which timeLimitMs passed or stopEvent (e.g. a
+    threading.Event) was set, and the caller can stop it by not asking for the next Progress.
+    """
+    start = time.perf_counter()
+    deadline = start + timeLimitMs / 1000 if timeLimitMs is not None else None
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding {encoding}, expected one of {ENCODINGS}")
+    # The default operators are looked up on every call, so they can be replaced, e.g. by profiling.
+    selection = selection or populationTournamentSelection
+    crossover = crossover or populationCrossover
+    mutation = mutation or encodingMutation(encoding)
+    selection, crossover, mutation = adaptListOperators(selection, crossover, mutation, q)
+    rng = np.random.default_rng(seed)
+    population = pop0 if isinstance(pop0, Population) else Population.fromTuples(pop0)
+    if encoding == "rows" and not (np.sort(population.grids(), axis=2) == np.arange(1, population.rowLength + 1)).all():
+        raise ValueError("Encoding rows needs every row of the initial population to be a permutation")
+
+    if hillClimbSteps and (q is not None or optimization is not min):
+        raise ValueError("hillClimbSteps needs the default q and optimization=min")
+
+    def score(population: Population, climbSteps: int = 0) -> np.ndarray:
+        if climbSteps:
+            counts = UnitCounts(population)
+            populationHillClimb(counts, climbSteps, rng, encoding)
+            return counts.scores
+        if q is None:
+            return qBatch(population.grids(), checkRows=encoding == "cells")
+        return np.array([q(boardTuple) for boardTuple in population.toTuples()])
+
     sollutions = []
-    bestSollution = optimization(pop0, key=q)
-    bestScore = q(optimization(pop0, key=q))
-    pop = pop0
-    popSize = len(pop)
+    scores = score(population)
+    bestIndex = optimization(range(len(population)), key=scores.__getitem__)
+    bestSollution = population.toTuple(bestIndex)
+    bestScore = int(scores[bestIndex])
+    popSize = len(population)
     evaluations = popSize + 1
+    yield Progress(0, bestScore, bestSollution, tuple(sollutions), evaluations, time.perf_counter() - start)
     for iteration in range(maxIter):
         if evaluations >= maxEvaluations:
-            return bestScore, bestSollution, sollutions, evaluations
-        selected = selection(pop, tournamentSize)
+            return
+        selected = selection(population, scores, tournamentSize, rng)
         evaluations += popSize
-        crossed = crossover(selected, crossoverProb)
-        mutated = mutation(crossed, mutationProb)
-        currentBest = optimization(mutated, key=q)
-        currentBestScore = q(currentBest)
+        crossed = crossover(selected, crossoverProb, rng)
+        mutated = mutation(crossed, mutationProb, rng)
+        scores = score(mutated, hillClimbSteps)
+        evaluations += popSize * hillClimbSteps
+        currentIndex = optimization(range(len(mutated)), key=scores.__getitem__)
+        currentBestScore = int(scores[currentIndex])
         evaluations += popSize + 1
         sollutions.append(currentBestScore)
         bestScore = optimization(bestScore, currentBestScore)
         if bestScore == currentBestScore:
-            bestSollution = currentBest
+            bestSollution = mutated.toTuple(currentIndex)
+        yield Progress(iteration + 1, bestScore, bestSollution, tuple(sollutions), evaluations, time.perf_counter() - start)
         if bestScore == 0:
-            return bestScore, bestSollution, sollutions, evaluations
-        pop = mutated
-    return bestScore, bestSollution, sollutions, evaluations
+            return
+        population = mutated
+        if migration is not None:
+            population, scores, stop = migration(iteration, population, scores)
+            if stop:
+                return
+        if (deadline is not None and time.perf_counter() >= deadline) or (stopEvent is not None and stopEvent.is_set()):
+            return
+
+
+def genethicAlgorithm(
+    pop0: list[(np.matrix, np.matrix)] | Population,
+    maxIter: int = 200,
+    tournamentSize: int = 2,
+    crossoverProb: float = 0.5,
+    mutationProb: float = 0.5,
+    maxEvaluations: int = float("inf"),
+    selection=None,
+    crossover=None,
+    mutation=None,
+    optimization=min,
+    q=None,
+    seed: int = None,
+    encoding: str = "cells",
+    hillClimbSteps: int = 0,
+    migration=None,
+    timeLimitMs: float | None = None,
+    stopEvent=None,
+) -> tuple[int, (np.matrix, np.matrix), list[int], int]:
+    """Runs iterateGenethicAlgorithm, which documents the parameters, to the end.
+
+    Returns the best score, the best solution, the best score of every generation and the number of evaluations.
+    """
+    for progress in iterateGenethicAlgorithm(
+        pop0, maxIter, tournamentSize, crossoverProb, mutationProb, maxEvaluations, selection, crossover, mutation, optimization, q,
+        seed, encoding, hillClimbSteps, migration, timeLimitMs, stopEvent,
+    ):
+        pass
+    return progress.bestScore, progress.bestSollution, list(progress.sollutions), progress.evaluations
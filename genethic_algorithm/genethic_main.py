@@ -1,23 +1,104 @@
-from board import readBoardsStrsFromFile, makeBoardsFromFile
+from board import makeBoardsFromFile, boardToStr
 from argparse import ArgumentParser
+from fitness import UnitCounts
 from genethic_algorithm import genethicAlgorithm
+from islands import islandGenethicAlgorithm
+import genethic_algorithm
+import os
+import sys
+
+# corpus.py, profiling.py, hyperparams.py and solution_cache.py live in the repository root, one level above this script.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from corpus import find_puzzle_file, read_puzzle
+from profiling import profiled
+from solution_cache import SolutionCache
+from hyperparams import load_hyperparams
+
+PROFILE_TARGETS = [
+    (
+        genethic_algorithm,
+        "q",
+        "qBatch",
+        "tournamentSelection",
+        "crossover",
+        "mutation",
+        "populationTournamentSelection",
+        "populationCrossover",
+        "populationMutation",
+        "populationRowMutation",
+        "populationHillClimb",
+    ),
+    (UnitCounts, "__init__", "swapDeltas", "swap"),
+]
 
 def main():
     parser = ArgumentParser(description="Sudoku Solver with Hyperparameters")
-    parser.add_argument("difficulty", help="Difficulty of the sudoku board")
+    parser.add_argument("difficulty", help="Difficulty of the sudoku board, or a board file (text or packed corpus)")
     parser.add_argument("-nboard", "--boardNumber", type=int, default=0, help="Number of board")
+    parser.add_argument(
+        "-enc", "--encoding", choices=("cells", "rows"), default="cells", help="Fill free cells from the whole board or keep every row a permutation"
+    )
+    parser.add_argument("-pop", "--pop0Size", type=int, default=100, help="Population size")
+    parser.add_argument("-iter", "--maxIter", type=int, default=200, help="Number of generations")
+    parser.add_argument("-tour", "--tournamentSize", type=int, default=50, help="Tournament size of the rank selection")
+    parser.add_argument("-cross", "--crossoverProb", type=float, default=0.1, help="Crossover probability")
+    parser.add_argument("-mut", "--mutationProb", type=float, default=0.2, help="Mutation probability")
+    parser.add_argument("-prop", "--propagate", action="store_true", help="Fix the cells decided by constraint propagation and fill the rest from their candidates")
+    parser.add_argument("-hill", "--hillClimbSteps", type=int, default=0, help="Delta scored hill-climb swaps per individual and generation")
+    parser.add_argument("-timeLimit", "--timeLimitMs", type=float, default=None, help="Stop with the best board so far after this many milliseconds")
+    parser.add_argument("-islands", "--islands", type=int, default=1, help="Number of populations evolving in separate processes")
+    parser.add_argument(
+        "-migr", "--migration-interval", dest="migrationInterval", type=int, default=10, help="Generations between migrations of the islands"
+    )
+    parser.add_argument("-cache", "--cache", default=None, help="SQLite solution cache file, answers boards equivalent to solved ones")
+    parser.add_argument("-profile", "--profile", action="store_true", help="Print calls and time of the GA's phases")
+    parser.add_argument("-profStats", "--profileStats", default=None, help="Run under cProfile and save its statistics to this file")
+    parser.add_argument(
+        "-hyper", "--hyperparams", default=None, help="Profiles file written by tuning.py, the difficulty's profile replaces the defaults"
+    )
 
+    args, _ = parser.parse_known_args()
+    if args.hyperparams:
+        # The profile's parameters are named like the arguments.
+        parser.set_defaults(**load_hyperparams(args.hyperparams, "ga", args.difficulty))
     args = parser.parse_args()
-    try:
-        boardsStr = readBoardsStrsFromFile(f"../resources/{args.difficulty}.txt")[args.boardNumber]
-    except FileNotFoundError:
-        boardsStr = readBoardsStrsFromFile(f"./resources/{args.difficulty}.txt")[args.boardNumber]
-    pop0 = makeBoardsFromFile(boardsStr, pop0Size=100, random_state=[index for index in range(800)])
+    boardsStr = read_puzzle(find_puzzle_file(args.difficulty), args.boardNumber)
     print("Solving...")
-    bestScore, bestSollution, sollutions, evaluations = genethicAlgorithm(pop0, maxIter=200, tournamentSize=50, crossoverProb=0.1, mutationProb=0.2)
+    cache = SolutionCache(args.cache) if args.cache else None
+    if cache is not None:
+        cached = cache.get(boardsStr)
+        if cached is not None:
+            print("Found in the solution cache")
+            print(cached)
+            return
+    gaParams = dict(
+        maxIter=args.maxIter, tournamentSize=args.tournamentSize, crossoverProb=args.crossoverProb, mutationProb=args.mutationProb,
+        encoding=args.encoding, hillClimbSteps=args.hillClimbSteps, timeLimitMs=args.timeLimitMs,
+    )
+    with profiled(PROFILE_TARGETS, args.profile, args.profileStats):
+        if args.islands > 1:
+            pop0s = [
+                makeBoardsFromFile(
+                    boardsStr,
+                    pop0Size=args.pop0Size,
+                    random_state=list(range(island * args.pop0Size, (island + 1) * args.pop0Size)),
+                    encoding=args.encoding,
+                    propagate=args.propagate,
+                )
+                for island in range(args.islands)
+            ]
+            bestScore, bestSollution, sollutions, evaluations = islandGenethicAlgorithm(pop0s, migrationInterval=args.migrationInterval, **gaParams)
+        else:
+            pop0 = makeBoardsFromFile(
+                boardsStr, pop0Size=args.pop0Size, random_state=list(range(args.pop0Size)), encoding=args.encoding, propagate=args.propagate
+            )
+            bestScore, bestSollution, sollutions, evaluations = genethicAlgorithm(pop0, **gaParams)
+    if cache is not None and bestScore == 0:
+        cache.put(boardsStr, boardToStr(bestSollution[0]))
     print(bestScore)
     print(bestSollution)
-    print(min(sollutions))
+    # sollutions is empty with -iter 0, the initial population's best is all there is.
+    print(min(sollutions, default=bestScore))
 
 
 
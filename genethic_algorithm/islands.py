@@ -0,0 +1,133 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import zip_longest
+from multiprocessing import Manager
+from multiprocessing.shared_memory import SharedMemory
+from threading import BrokenBarrierError
+import numpy as np
+try:
+    from population import Population
+    from genethic_algorithm import genethicAlgorithm
+except ModuleNotFoundError:
+    from genethic_algorithm.genethic_algorithm import genethicAlgorithm
+    from genethic_algorithm.population import Population
+
+
+class MigrationBuffer:
+    """Shared memory block through which the islands exchange their best boards and signal a global stop.
+
+    Layout: one stop byte, then the (islands, size, cells) uint8 migrant boards and their (islands, size)
+    int64 scores. Every island writes only its own slot and reads the slot of the previous island.
+    """
+
+    def __init__(self, islands: int, size: int, cells: int, name: str | None = None) -> None:
+        self.islands, self.size, self.cells = islands, size, cells
+        boardsBytes = islands * size * cells
+        # Scores are 8-byte aligned after the stop byte and the boards.
+        scoresOffset = -(-(1 + boardsBytes) // 8) * 8
+        nbytes = scoresOffset + islands * size * 8
+        self.memory = SharedMemory(name=name, create=name is None, size=nbytes)
+        self.stopFlag = np.ndarray((1,), dtype=np.uint8, buffer=self.memory.buf)
+        self.boards = np.ndarray((islands, size, cells), dtype=np.uint8, buffer=self.memory.buf, offset=1)
+        self.scores = np.ndarray((islands, size), dtype=np.int64, buffer=self.memory.buf, offset=scoresOffset)
+        if name is None:
+            self.stopFlag[0] = 0
+
+    def attach(self) -> tuple:
+        # What a worker needs to open the same block with MigrationBuffer(*buffer.attach()).
+        return self.islands, self.size, self.cells, self.memory.name
+
+    def stopped(self) -> bool:
+        return bool(self.stopFlag[0])
+
+    def stop(self) -> None:
+        self.stopFlag[0] = 1
+
+    def close(self) -> None:
+        # The views have to go before the block can be closed.
+        del self.stopFlag, self.boards, self.scores
+        self.memory.close()
+
+
+class IslandMigration:
+    """genethicAlgorithm migration hook: every interval generations the island's best individuals replace
+    the worst individuals of the next island in a ring."""
+
+    def __init__(self, island: int, buffer: MigrationBuffer, barrier, interval: int) -> None:
+        self.island = island
+        self.buffer = buffer
+        self.barrier = barrier
+        self.interval = interval
+
+    def __call__(self, iteration: int, population: Population, scores: np.ndarray) -> tuple[Population, np.ndarray, bool]:
+        if self.buffer.stopped():
+            return population, scores, True
+        if (iteration + 1) % self.interval:
+            return population, scores, False
+        size = self.buffer.size
+        order = np.argsort(scores, kind="stable")
+        self.buffer.boards[self.island] = population.boards[order[:size]]
+        self.buffer.scores[self.island] = scores[order[:size]]
+        try:
+            self.barrier.wait()
+            source = (self.island - 1) % self.buffer.islands
+            immigrants, immigrantScores = self.buffer.boards[source].copy(), self.buffer.scores[source].copy()
+            # Nobody writes the next migrants before every island has read these.
+            self.barrier.wait()
+        except BrokenBarrierError:
+            # Another island finished, so the exchange is abandoned.
+            return population, scores, True
+        boards, scores = population.boards.copy(), scores.copy()
+        boards[order[-size:]] = immigrants
+        scores[order[-size:]] = immigrantScores
+        return population.withBoards(boards), scores, False
+
+
+def _runIsland(island: int, population: Population, bufferAttach: tuple, barrier, interval: int, seed, gaParams: dict) -> tuple:
+    buffer = MigrationBuffer(*bufferAttach)
+    try:
+        migration = IslandMigration(island, buffer, barrier, interval)
+        bestScore, bestSollution, sollutions, evaluations = genethicAlgorithm(population, seed=seed, migration=migration, **gaParams)
+        if bestScore == 0:
+            buffer.stop()
+        return bestScore, np.asarray(bestSollution[0], dtype=np.uint8), sollutions, evaluations
+    finally:
+        # An island that is done never reaches the next exchange, so the others must not wait for it.
+        barrier.abort()
+        buffer.close()
+
+
+def islandGenethicAlgorithm(
+    pop0s: list[list[(np.matrix, np.matrix)] | Population],
+    migrationInterval: int = 10,
+    migrationSize: int = 5,
+    seed: int = None,
+    **gaParams,
+) -> tuple[int, (np.matrix, np.matrix), list[int], int]:
+    """Island model: every initial population evolves with genethicAlgorithm in its own process.
+
+    Every migrationInterval generations each island sends its migrationSize best boards to the next
+    island through shared memory. All islands stop once one of them finds a solution. Returns the same
+    tuple as genethicAlgorithm, sollutions being the best score of every generation over all islands
+    and evaluations the sum over all islands.
+    """
+    populations = [pop0 if isinstance(pop0, Population) else Population.fromTuples(pop0) for pop0 in pop0s]
+    islands = len(populations)
+    size = min(migrationSize, *(len(population) for population in populations))
+    buffer = MigrationBuffer(islands, size, populations[0].boards.shape[1])
+    islandSeeds = np.random.SeedSequence(seed).spawn(islands)
+    try:
+        with Manager() as manager, ProcessPoolExecutor(islands) as executor:
+            barrier = manager.Barrier(islands)
+            futures = [
+                executor.submit(_runIsland, island, populations[island], buffer.attach(), barrier, migrationInterval, islandSeeds[island], gaParams)
+                for island in range(islands)
+            ]
+            results = [future.result() for future in futures]
+    finally:
+        buffer.close()
+        buffer.memory.unlink()
+    bestIsland = min(range(islands), key=lambda island: results[island][0])
+    bestScore, bestBoard = results[bestIsland][0], results[bestIsland][1]
+    sollutions = [min(score for score in scores if score is not None) for scores in zip_longest(*(result[2] for result in results))]
+    evaluations = sum(result[3] for result in results)
+    return bestScore, populations[bestIsland].withBoards(bestBoard.reshape(1, -1)).toTuple(0), sollutions, evaluations
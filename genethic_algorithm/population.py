@@ -0,0 +1,46 @@
+import numpy as np
+
+
+class Population:
+    """Boards of a whole population stored as one (pop, cells) uint8 array.
+
+    The fixed-cell mask is the same for every individual, so it is stored once and shared by every
+    population derived from this one. Boards are kept in the row-major order of the np.matrix boards.
+    """
+
+    def __init__(self, boards: np.ndarray, mask: np.ndarray, rowLength: int = 9) -> None:
+        self.boards = boards
+        self.mask = mask
+        self.rowLength = rowLength
+        self.freeIndexes = np.flatnonzero(~mask)
+
+    @classmethod
+    def fromTuples(cls, pop: list[(np.matrix, np.matrix)]) -> "Population":
+        rowLength = pop[0][0].shape[0]
+        boards = np.stack([np.asarray(boardTuple[0]).reshape(-1) for boardTuple in pop]).astype(np.uint8)
+        mask = np.asarray(pop[0][1], dtype=bool).reshape(-1)
+        return cls(boards, mask, rowLength)
+
+    def toTuple(self, index: int) -> tuple[np.matrix, np.matrix]:
+        shape = (self.rowLength, self.rowLength)
+        return np.matrix(self.boards[index].reshape(shape), dtype=int), np.matrix(self.mask.reshape(shape))
+
+    def toTuples(self) -> list[(np.matrix, np.matrix)]:
+        return [self.toTuple(index) for index in range(len(self))]
+
+    def grids(self) -> np.ndarray:
+        return self.boards.reshape(len(self), self.rowLength, self.rowLength)
+
+    def take(self, indexes: np.ndarray) -> "Population":
+        return self.withBoards(self.boards[indexes])
+
+    def withBoards(self, boards: np.ndarray) -> "Population":
+        population = Population.__new__(Population)
+        population.boards = boards
+        population.mask = self.mask
+        population.rowLength = self.rowLength
+        population.freeIndexes = self.freeIndexes
+        return population
+
+    def __len__(self) -> int:
+        return len(self.boards)
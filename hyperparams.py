@@ -0,0 +1,29 @@
+import json
+import os
+
+
+def read_profiles(path: str) -> dict:
+    """Profiles written by tuning.py: {engine: {difficulty: {"params": {...}, "median_time": ..., ...}}}, {} if there is no file."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def save_profile(path: str, engine: str, difficulty: str, profile: dict) -> None:
+    # Profiles of the other engines and difficulties already in the file are kept.
+    profiles = read_profiles(path)
+    profiles.setdefault(engine, {})[difficulty] = profile
+    with open(path, "w") as file:
+        json.dump(profiles, file, indent=1)
+
+
+def load_hyperparams(path: str, engine: str, difficulty: str) -> dict:
+    """Tuned parameters of engine for a difficulty, or a board file named after one, {} if the file has none.
+
+    Only json and os are imported here, so the package scripts can load profiles without the engines.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No hyperparameter profiles file {path}")
+    key = os.path.splitext(os.path.basename(difficulty))[0]
+    return read_profiles(path).get(engine, {}).get(key, {}).get("params", {})
@@ -0,0 +1,96 @@
+import cProfile
+import functools
+import inspect
+import pstats
+import time
+from contextlib import contextmanager
+from tabulate import tabulate
+
+
+class Profiler:
+    """Counts the calls of chosen functions and methods and the time spent in them.
+
+    instrument() replaces the attributes with timed wrappers and restore() puts the originals back,
+    so nothing is wrapped and nothing costs anything unless profiling was asked for. Times are
+    inclusive: a phase called from another phase is counted in both. Only calls made in this process
+    are counted, the workers of the parallel modes are not.
+    """
+
+    def __init__(self) -> None:
+        self.calls: dict[str, int] = {}
+        self.times: dict[str, float] = {}
+        self.patched = []
+
+    def instrument(self, owner, *attributes: str) -> None:
+        """Wraps owner.attribute for every attribute, owner being a class or a module."""
+        for attribute in attributes:
+            original = inspect.getattr_static(owner, attribute)
+            phase = f"{owner.__name__}.{attribute}"
+            if isinstance(original, (staticmethod, classmethod)):
+                wrapper = type(original)(self._timed(original.__func__, phase))
+            else:
+                wrapper = self._timed(original, phase)
+            setattr(owner, attribute, wrapper)
+            self.patched.append((owner, attribute, original))
+
+    def restore(self) -> None:
+        for owner, attribute, original in reversed(self.patched):
+            setattr(owner, attribute, original)
+        self.patched.clear()
+
+    def _timed(self, function, phase: str):
+        calls, times = self.calls, self.times
+        calls[phase] = 0
+        times[phase] = 0.0
+        perf_counter = time.perf_counter
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                times[phase] += perf_counter() - start
+                calls[phase] += 1
+
+        return timed
+
+    def report(self, wall_time: float) -> str:
+        # Phases that were never called, e.g. of the solver that did not run, are left out.
+        phases = [phase for phase in sorted(self.times, key=self.times.get, reverse=True) if self.calls[phase]]
+        rows = [
+            (phase, self.calls[phase], self.times[phase], self.times[phase] / self.calls[phase] * 1e6, self.times[phase] / wall_time * 100)
+            for phase in phases
+        ]
+        table = tabulate(rows, headers=("phase", "calls", "total s", "mean us", "% of wall"), floatfmt=(None, None, ".4f", ".2f", ".1f"))
+        return f"{table}\nwall time {wall_time:.4f} s, phase times are inclusive"
+
+
+@contextmanager
+def profiled(targets: list[tuple], enabled: bool, stats_path: str | None = None):
+    """Runs the block with the targets instrumented when enabled and under cProfile when stats_path is given.
+
+    targets are (owner, attribute, ...) tuples passed to Profiler.instrument. On exit the per-phase
+    breakdown is printed and the cProfile statistics are dumped to stats_path, readable with pstats.
+    """
+    profiler = Profiler()
+    if enabled:
+        for owner, *attributes in targets:
+            profiler.instrument(owner, *attributes)
+    c_profile = cProfile.Profile() if stats_path else None
+    start = time.perf_counter()
+    if c_profile is not None:
+        c_profile.enable()
+    try:
+        yield profiler
+    finally:
+        if c_profile is not None:
+            c_profile.disable()
+        wall_time = time.perf_counter() - start
+        profiler.restore()
+        if enabled:
+            print(f"\n{profiler.report(wall_time)}")
+        if c_profile is not None:
+            c_profile.dump_stats(stats_path)
+            print(f"\ncProfile statistics saved to {stats_path}, top functions by cumulative time:")
+            pstats.Stats(stats_path).sort_stats("cumulative").print_stats(15)
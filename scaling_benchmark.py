@@ -0,0 +1,65 @@
+from argparse import ArgumentParser
+from ACO.Board import VALUE_CHARS
+from ACO.Solver import Solver
+from ACO.utils import create_board_from_str
+from genethic_algorithm.board import makeBoardsFromFile
+from genethic_algorithm.genethic_algorithm import genethicAlgorithm
+import math
+import random
+import time
+
+
+def generate_puzzle(size: int, givens_ratio: float, seed: int) -> str:
+    """Random puzzle of a size x size board: a shuffled pattern solution with 1 - givens_ratio of the cells emptied.
+
+    The puzzles are not guaranteed to have a unique solution, which does not matter for timing the engines.
+    """
+    rng = random.Random(seed)
+    square_size = math.isqrt(size)
+
+    def shuffled_lines() -> list[int]:
+        bands = rng.sample(range(square_size), square_size)
+        return [band * square_size + line for band in bands for line in rng.sample(range(square_size), square_size)]
+
+    values = rng.sample(range(1, size + 1), size)
+    rows, columns = shuffled_lines(), shuffled_lines()
+    cells = []
+    for row in rows:
+        for column in columns:
+            pattern = (square_size * (row % square_size) + row // square_size + column) % size
+            cells.append(VALUE_CHARS[values[pattern] - 1] if rng.random() < givens_ratio else ".")
+    return "".join(cells)
+
+
+def measure_aco(puzzle: str, args) -> tuple[float, int]:
+    start = time.perf_counter()
+    score, _, _, _, iterations = Solver(args.antsNum, 0.9, 0.1, 0.9, 0.005, args.iterations, seed=args.seed).solve(create_board_from_str(puzzle))
+    return (time.perf_counter() - start) / iterations, score
+
+
+def measure_ga(puzzle: str, args) -> tuple[float, int]:
+    pop0 = makeBoardsFromFile(puzzle, pop0Size=args.popSize, random_state=list(range(args.popSize)))
+    start = time.perf_counter()
+    score, _, sollutions, _ = genethicAlgorithm(pop0, maxIter=args.generations, tournamentSize=args.popSize // 2, seed=args.seed)
+    return (time.perf_counter() - start) / max(len(sollutions), 1), score
+
+
+def main():
+    parser = ArgumentParser(description="ACO and GA runtime on 9x9, 16x16 and 25x25 boards")
+    parser.add_argument("-givens", "--givensRatio", type=float, default=0.5, help="Fraction of the cells given in the generated puzzles")
+    parser.add_argument("-antsNum", "--antsNum", type=int, default=10, help="Number of ants")
+    parser.add_argument("-iter", "--iterations", type=int, default=5, help="ACO iterations")
+    parser.add_argument("-pop", "--popSize", type=int, default=100, help="GA population size")
+    parser.add_argument("-gen", "--generations", type=int, default=50, help="GA generations")
+    parser.add_argument("-seed", "--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    print(f"{'size':>7} {'ACO s/iteration':>16} {'ACO score':>10} {'GA ms/generation':>17} {'GA score':>9}")
+    for size in (9, 16, 25):
+        puzzle = generate_puzzle(size, args.givensRatio, args.seed)
+        aco_time, aco_score = measure_aco(puzzle, args)
+        ga_time, ga_score = measure_ga(puzzle, args)
+        print(f"{size:>3}x{size:<3} {aco_time:16.4f} {aco_score:10d} {ga_time * 1000:17.2f} {ga_score:9d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import itertools
+import sqlite3
+import time
+from functools import lru_cache
+import numpy as np
+
+BOARD_SIZE = 9
+SQUARE_SIZE = 3
+EMPTY_CHARS = ".0"
+# Pattern-equivalent arrangements compared by their digits, beyond this the first ones found are used.
+MAX_TIED_ARRANGEMENTS = 2000
+# Puzzles with fewer givens never have a unique solution and have huge tie sets, they are only keyed exactly.
+MIN_CANONICAL_GIVENS = 17
+
+
+def _line_orders() -> np.ndarray:
+    # The 1296 orders of rows (or columns) that keep bands (stacks) together: band order x order within every band.
+    orders = []
+    for bands in itertools.permutations(range(SQUARE_SIZE)):
+        for inner in itertools.product(itertools.permutations(range(SQUARE_SIZE)), repeat=SQUARE_SIZE):
+            orders.append([band * SQUARE_SIZE + line for band, lines in zip(bands, inner) for line in lines])
+    return np.array(orders, dtype=np.intp)
+
+
+LINE_ORDERS = _line_orders()
+BIT_WEIGHTS = 1 << np.arange(BOARD_SIZE - 1, -1, -1)
+
+
+class Transform:
+    """Maps a 9x9 grid to its canonical frame: optional transposition, then row and column orders, then digit relabeling."""
+
+    def __init__(self, transposed: bool, rows: tuple[int, ...], columns: tuple[int, ...], relabel: dict[int, int]) -> None:
+        self.transposed = transposed
+        self.rows = rows
+        self.columns = columns
+        # Digits missing from the puzzle are interchangeable, they get the remaining labels in increasing order.
+        missing = [digit for digit in range(1, BOARD_SIZE + 1) if digit not in relabel]
+        unused = [label for label in range(1, BOARD_SIZE + 1) if label not in relabel.values()]
+        self.relabel = {0: 0, **relabel, **dict(zip(missing, unused))}
+        self.inverse = {label: digit for digit, label in self.relabel.items()}
+
+    def apply(self, values: list[int]) -> list[int]:
+        grid = np.array(values).reshape(BOARD_SIZE, BOARD_SIZE)
+        if self.transposed:
+            grid = grid.T
+        return [self.relabel[value] for value in grid[np.ix_(self.rows, self.columns)].flat]
+
+    def invert(self, values: list[int]) -> list[int]:
+        grid = np.empty((BOARD_SIZE, BOARD_SIZE), dtype=int)
+        grid[np.ix_(self.rows, self.columns)] = np.array([self.inverse[value] for value in values]).reshape(BOARD_SIZE, BOARD_SIZE)
+        if self.transposed:
+            grid = grid.T
+        return grid.reshape(-1).tolist()
+
+
+def _relabeled(values) -> tuple[list[int], dict[int, int]]:
+    # Digits are renamed in order of first appearance, so relabeled puzzles compare equal.
+    relabel = {}
+    result = []
+    for value in values:
+        if value:
+            value = relabel.setdefault(value, len(relabel) + 1)
+        result.append(value)
+    return result, relabel
+
+
+def _tied_orders(codes: np.ndarray) -> list[tuple[int, ...]]:
+    """Every row order that sorts the rows' codes within bands and then the bands, i.e. gives the smallest code sequence."""
+    bands = []
+    for band in range(SQUARE_SIZE):
+        rows = sorted(range(band * SQUARE_SIZE, (band + 1) * SQUARE_SIZE), key=lambda row: codes[row])
+        groups = [list(group) for _, group in itertools.groupby(rows, key=lambda row: codes[row])]
+        bands.append((tuple(codes[row] for row in rows), groups))
+    bands.sort(key=lambda band: band[0])
+    band_groups = [list(group) for _, group in itertools.groupby(bands, key=lambda band: band[0])]
+
+    orders = []
+    for band_order in itertools.product(*(itertools.permutations(group) for group in band_groups)):
+        ordered_bands = [band for group in band_order for band in group]
+        for row_orders in itertools.product(
+            *(itertools.permutations(group) for _, groups in ordered_bands for group in groups)
+        ):
+            orders.append(tuple(row for group in row_orders for row in group))
+            if len(orders) >= MAX_TIED_ARRANGEMENTS:
+                return orders
+    return orders
+
+
+def canonicalize(values: list[int]) -> tuple[str, Transform]:
+    """Canonical form of a 9x9 puzzle under transposition, band/stack and row/column-within-band permutations and relabeling.
+
+    Arrangements are first compared by the pattern of given cells: for every transposition and column
+    order the smallest pattern comes from sorting the rows within bands and then the bands, done with
+    numpy for all 2592 of them at once. Only the arrangements tied on the smallest pattern are compared
+    by their relabeled digits.
+    """
+    grid = np.array(values).reshape(BOARD_SIZE, BOARD_SIZE)
+    grids = (grid, grid.T)
+    # codes[t, c, r]: given cells of row r as bits, after transposition t and column order c.
+    codes = np.stack([(frame[:, LINE_ORDERS] != 0) @ BIT_WEIGHTS for frame in grids]).transpose(0, 2, 1)
+    band_codes = np.sort(codes.reshape(2, len(LINE_ORDERS), SQUARE_SIZE, SQUARE_SIZE), axis=-1)
+    band_keys = np.sort((band_codes[..., 0] << 2 * BOARD_SIZE) | (band_codes[..., 1] << BOARD_SIZE) | band_codes[..., 2], axis=-1)
+    best = min(map(tuple, band_keys.reshape(-1, SQUARE_SIZE).tolist()))
+    tied = np.flatnonzero((band_keys.reshape(-1, SQUARE_SIZE) == best).all(axis=1))
+
+    best_string, best_transform = None, None
+    arrangements = 0
+    for flat in tied.tolist():
+        transposed, column_order = divmod(flat, len(LINE_ORDERS))
+        columns = LINE_ORDERS[column_order]
+        frame = grids[transposed][:, columns]
+        for rows in _tied_orders(codes[transposed, column_order].tolist()):
+            relabeled, relabel = _relabeled(frame[list(rows)].flat)
+            if best_string is None or relabeled < best_string:
+                best_string, best_transform = relabeled, (bool(transposed), rows, tuple(columns.tolist()), relabel)
+            arrangements += 1
+            if arrangements >= MAX_TIED_ARRANGEMENTS:
+                break
+        if arrangements >= MAX_TIED_ARRANGEMENTS:
+            break
+    return "".join(str(value) if value else "." for value in best_string), Transform(*best_transform)
+
+
+def _values(puzzle: str) -> list[int]:
+    return [0 if char in EMPTY_CHARS else int(char) for char in puzzle]
+
+
+class SolutionCache:
+    """Persistent puzzle -> solution cache in a SQLite file, with least recently used eviction.
+
+    Every puzzle is stored under its own string, "." for empty cells, which is looked up first. 9x9
+    puzzles with at least MIN_CANONICAL_GIVENS givens are also stored under their canonical form, which
+    is only computed on a miss: a puzzle equal to a cached one up to relabeling, row/column permutations
+    within bands, band/stack permutations or transposition is then a hit, gets the cached solution
+    mapped back to its own frame and is stored under its own string too. A canonical form is a puzzle
+    itself and its row holds that puzzle's solution, so both kinds of rows share one table.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000) -> None:
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS solutions (puzzle TEXT PRIMARY KEY, solution TEXT NOT NULL, used INTEGER NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used)")
+
+    def _normalized(self, puzzle: str) -> tuple[str, bool]:
+        # The puzzle's own key and whether it also gets a canonical one.
+        puzzle = puzzle.strip()
+        if len(puzzle) != BOARD_SIZE * BOARD_SIZE or not all(char in EMPTY_CHARS or char.isdigit() for char in puzzle):
+            return puzzle, False
+        puzzle = "".join("." if char in EMPTY_CHARS else char for char in puzzle)
+        return puzzle, len(puzzle) - puzzle.count(".") >= MIN_CANONICAL_GIVENS
+
+    def _lookup(self, key: str) -> str | None:
+        row = self.connection.execute("SELECT solution FROM solutions WHERE puzzle = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with self.connection:
+            self.connection.execute("UPDATE solutions SET used = ? WHERE puzzle = ?", (time.time_ns(), key))
+        return row[0]
+
+    def get(self, puzzle: str) -> str | None:
+        puzzle, canonical = self._normalized(puzzle)
+        solution = self._lookup(puzzle)
+        if solution is not None or not canonical:
+            return solution
+        key, transform = canonicalize(_values(puzzle))
+        solution = self._lookup(key)
+        if solution is None:
+            return None
+        solution = "".join(map(str, transform.invert(_values(solution))))
+        self._insert([(puzzle, solution)])
+        return solution
+
+    def put(self, puzzle: str, solution: str) -> None:
+        puzzle, canonical = self._normalized(puzzle)
+        rows = [(puzzle, solution)]
+        if canonical:
+            key, transform = canonicalize(_values(puzzle))
+            rows.append((key, "".join(map(str, transform.apply(_values(solution))))))
+        self._insert(rows)
+
+    def _insert(self, rows: list[tuple[str, str]]) -> None:
+        used = time.time_ns()
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)", [(key, solution, used) for key, solution in rows])
+            (count,) = self.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()
+            if count > self.max_entries:
+                self.connection.execute(
+                    "DELETE FROM solutions WHERE puzzle IN (SELECT puzzle FROM solutions ORDER BY used LIMIT ?)", (count - self.max_entries,)
+                )
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "SolutionCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+@lru_cache(maxsize=None)
+def open_cache(path: str) -> SolutionCache:
+    # One connection per process and path, for the worker processes of batch_main.py.
+    return SolutionCache(path)
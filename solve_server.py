@@ -0,0 +1,306 @@
+import asyncio
+import bisect
+import json
+import os
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from engines import ENGINES, TIME_LIMIT_PARAMS, solve_batch, solve_puzzle
+
+# Longest request line read, a longer one is skipped and answered with an error.
+MAX_LINE_BYTES = 1 << 16
+# Concurrent requests for these engines with the same params are solved together by engines.solve_batch.
+BATCHED_ENGINES = ("vectorized",)
+LATENCY_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+
+class LatencyHistogram:
+    """Request latencies counted in the LATENCY_BOUNDS_MS buckets, the last bucket holding everything slower."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BOUNDS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def add(self, latency_ms: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BOUNDS_MS, latency_ms)] += 1
+        self.total += 1
+        self.sum_ms += latency_ms
+
+    def quantile(self, q: float) -> float | None:
+        # Upper bound of the bucket holding the quantile, None when it is in the overflow bucket or nothing was counted.
+        if not self.total:
+            return None
+        seen = 0
+        for bound, count in zip(LATENCY_BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= q * self.total:
+                return bound
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "bounds_ms": list(LATENCY_BOUNDS_MS),
+            "counts": self.counts,
+            "total": self.total,
+            "mean_ms": self.sum_ms / self.total if self.total else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+        }
+
+
+def solve_job(engine: str, puzzle: str, params: dict, seed: int | None, deadline: float | None, cache: str | None) -> dict:
+    """Solves one request in a worker process.
+
+    deadline is a time.time() timestamp, so it means the same in every process. What is left of it when the
+    puzzle starts becomes the engine's time limit, a puzzle whose deadline already passed is not solved.
+    """
+    if deadline is not None:
+        remaining_ms = (deadline - time.time()) * 1000
+        if remaining_ms <= 0:
+            return {"puzzle": puzzle, "error": "deadline exceeded"}
+        params = {**params, TIME_LIMIT_PARAMS[engine]: remaining_ms}
+    try:
+        return solve_puzzle(engine, puzzle, params, seed=seed, cache=cache)
+    except Exception as error:
+        return {"puzzle": puzzle, "error": f"{type(error).__name__}: {error}"}
+
+
+def solve_batch_job(puzzles: list[str], params: dict, seeds: list[int | None], deadlines: list[float | None], cache: str | None) -> list[dict]:
+    """Solves a micro-batch of vectorized requests in a worker process, as one VectorizedSolver batch.
+
+    What is left of every deadline when the batch starts is that puzzle's time limit, like in solve_job.
+    """
+    now = time.time()
+    records = [{"puzzle": puzzle, "error": "deadline exceeded"} for puzzle in puzzles]
+    started = [index for index, deadline in enumerate(deadlines) if deadline is None or deadline > now]
+    time_limits_ms = [(deadlines[index] - now) * 1000 if deadlines[index] is not None else None for index in started]
+    try:
+        solved = solve_batch([puzzles[index] for index in started], params, [seeds[index] for index in started], time_limits_ms, cache)
+    except Exception as error:
+        solved = [{"puzzle": puzzles[index], "error": f"{type(error).__name__}: {error}"} for index in started]
+    for index, record in zip(started, solved):
+        records[index] = record
+    return records
+
+
+async def read_line(reader: asyncio.StreamReader) -> bytes | None:
+    """The next line, b"" at the end of the stream, None for a line longer than the reader's limit, which is skipped."""
+    overlong = False
+    while True:
+        try:
+            line = await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as error:
+            line = error.partial
+        except asyncio.LimitOverrunError as error:
+            # The bytes searched so far are dropped, the search for the end of the line goes on.
+            await reader.readexactly(error.consumed)
+            overlong = True
+            continue
+        return None if overlong else line
+
+
+def request_error(request) -> str | None:
+    # Why a decoded request can not be solved, None if it can.
+    if not isinstance(request, dict):
+        return "a request has to be a JSON object"
+    if request.get("engine", "aco") not in ENGINES or not isinstance(request.get("puzzle"), str):
+        return f"a request needs a puzzle string and an engine out of {ENGINES}"
+    if not isinstance(request.get("params", {}), dict):
+        return "params has to be a JSON object"
+    deadline_ms = request.get("deadline_ms")
+    if deadline_ms is not None and (isinstance(deadline_ms, bool) or not isinstance(deadline_ms, (int, float))):
+        return "deadline_ms has to be a number"
+    seed = request.get("seed")
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+        return "seed has to be an integer"
+    return None
+
+
+class SolveServer:
+    """Long-lived solve server speaking JSON Lines over TCP or a Unix socket.
+
+    A request is {"puzzle": ..., "engine": ..., "params": {...}, "seed": ..., "deadline_ms": ..., "id": ...},
+    only the puzzle being required, and is answered with the solve_puzzle record, or {"error": ...}, with
+    the same id. Every line is answered, a malformed one or one longer than MAX_LINE_BYTES with an error.
+    Requests of a connection are answered as they finish, not in order. {"op": "stats"} is answered with
+    the latency histogram of every engine.
+
+    The engines run on a pool of worker processes started once. Concurrent requests for BATCHED_ENGINES
+    with the same params are collected for batch_window_ms, or until max_batch of them, and solved by a
+    worker as one batch whose ants share the solver's arrays; a request's result does not depend on the
+    others in its batch. At most max_pending requests are in progress: once they are, the server stops
+    reading from the connections until one finishes, so the clients are slowed down by the socket.
+    """
+
+    def __init__(
+        self, workers: int | None = None, batch_window_ms: float = 5, max_batch: int = 8, max_pending: int = 256, cache: str | None = None
+    ) -> None:
+        self.workers = workers or os.cpu_count()
+        self.batch_window_ms = batch_window_ms
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.cache = cache
+        self.executor = ProcessPoolExecutor(self.workers)
+        # Requests waiting for their batch and the timer that flushes it, by engine and params.
+        self.batches: dict[tuple[str, str], tuple[list[tuple[tuple, asyncio.Future]], asyncio.TimerHandle]] = {}
+        self.histograms = {engine: LatencyHistogram() for engine in ENGINES}
+        self.batch_count = 0
+        self.batched_requests = 0
+        self.pending = 0
+
+    async def warm_up(self) -> None:
+        # The pool starts its processes lazily, one job per worker starts them all before the first request.
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, os.getpid) for _ in range(self.workers)))
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765, unix_path: str | None = None) -> asyncio.Server:
+        # Listening server, serve() runs it until cancelled.
+        self.slots = asyncio.Semaphore(self.max_pending)
+        await self.warm_up()
+        if unix_path:
+            return await asyncio.start_unix_server(self.handle_connection, unix_path, limit=MAX_LINE_BYTES)
+        return await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE_BYTES)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix_path: str | None = None) -> None:
+        server = await self.start(host, port, unix_path)
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                await self.slots.acquire()
+                try:
+                    line = await read_line(reader)
+                except ConnectionError:
+                    # A client resetting the connection ends it like EOF.
+                    line = b""
+                except BaseException:
+                    self.slots.release()
+                    raise
+                if line == b"":
+                    self.slots.release()
+                    break
+                task = asyncio.create_task(self._answer(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+    async def _answer(self, line: bytes, writer: asyncio.StreamWriter, write_lock: asyncio.Lock) -> None:
+        self.pending += 1
+        try:
+            try:
+                response = await self.handle_request(line)
+            except Exception as error:
+                response = {"error": f"{type(error).__name__}: {error}"}
+            async with write_lock:
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.pending -= 1
+            self.slots.release()
+
+    async def handle_request(self, line: bytes | None) -> dict:
+        start = time.perf_counter()
+        if line is None:
+            return {"error": f"request line longer than {MAX_LINE_BYTES} bytes"}
+        try:
+            request = json.loads(line)
+        except ValueError as error:
+            # Also invalid UTF-8, UnicodeDecodeError is a ValueError like JSONDecodeError.
+            return {"error": f"invalid JSON: {error}"}
+        if isinstance(request, dict) and request.get("op") == "stats":
+            return {
+                "id": request.get("id"),
+                "pending": self.pending,
+                "batches": {"count": self.batch_count, "requests": self.batched_requests},
+                "latency": {engine: histogram.to_dict() for engine, histogram in self.histograms.items()},
+            }
+        error = request_error(request)
+        if error is not None:
+            return {"id": request.get("id") if isinstance(request, dict) else None, "error": error}
+        engine = request.get("engine", "aco")
+        deadline = time.time() + request["deadline_ms"] / 1000 if request.get("deadline_ms") is not None else None
+        job = (request["puzzle"], request.get("params", {}), request.get("seed"), deadline)
+        try:
+            record = await self.submit(engine, job)
+        except Exception as error:
+            record = {"puzzle": request["puzzle"], "error": f"{type(error).__name__}: {error}"}
+        self.histograms[engine].add((time.perf_counter() - start) * 1000)
+        return {"id": request.get("id"), **record}
+
+    def submit(self, engine: str, job: tuple) -> asyncio.Future:
+        # job is (puzzle, params, seed, deadline), the future's result its record.
+        loop = asyncio.get_running_loop()
+        if engine not in BATCHED_ENGINES:
+            return loop.run_in_executor(self.executor, solve_job, engine, *job, self.cache)
+        key = (engine, json.dumps(job[1], sort_keys=True))
+        future = loop.create_future()
+        if key not in self.batches:
+            self.batches[key] = ([], loop.call_later(self.batch_window_ms / 1000, self._flush, key))
+        batch, _ = self.batches[key]
+        batch.append((job, future))
+        if len(batch) >= self.max_batch:
+            self._flush(key)
+        return future
+
+    def _flush(self, key: tuple[str, str]) -> None:
+        batch, timer = self.batches.pop(key)
+        timer.cancel()
+        self.batch_count += 1
+        self.batched_requests += len(batch)
+        puzzles, params, seeds, deadlines = zip(*(job for job, _ in batch))
+        futures = [future for _, future in batch]
+        pool_future = asyncio.get_running_loop().run_in_executor(
+            self.executor, solve_batch_job, list(puzzles), params[0], list(seeds), list(deadlines), self.cache
+        )
+
+        def distribute(done: asyncio.Future) -> None:
+            for index, future in enumerate(futures):
+                if future.done():
+                    continue
+                if done.cancelled():
+                    future.cancel()
+                elif done.exception() is not None:
+                    future.set_exception(done.exception())
+                else:
+                    future.set_result(done.result()[index])
+
+        pool_future.add_done_callback(distribute)
+
+
+def main():
+    parser = ArgumentParser(description="Serve the engines over TCP or a Unix socket, requests and responses are JSON Lines")
+    parser.add_argument("-host", "--host", default="127.0.0.1", help="TCP host")
+    parser.add_argument("-port", "--port", type=int, default=8765, help="TCP port")
+    parser.add_argument("-unix", "--unix", default=None, help="Unix socket path, used instead of TCP")
+    parser.add_argument("-workers", "--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("-window", "--batchWindowMs", type=float, default=5, help="Time vectorized requests wait to be batched with others")
+    parser.add_argument("-maxBatch", "--maxBatch", type=int, default=8, help="Largest micro-batch")
+    parser.add_argument("-maxPending", "--maxPending", type=int, default=256, help="Requests in progress before the server stops reading")
+    parser.add_argument("-cache", "--cache", default=None, help="SQLite solution cache file, answers boards equivalent to solved ones")
+
+    args = parser.parse_args()
+    server = SolveServer(args.workers, args.batchWindowMs, args.maxBatch, args.maxPending, args.cache)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
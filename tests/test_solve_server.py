@@ -0,0 +1,103 @@
+import asyncio
+import json
+import os
+import socket
+import struct
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engines import solve_puzzle
+from solve_server import MAX_LINE_BYTES, SolveServer
+
+PUZZLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources", "easy.txt")
+
+
+def _puzzle() -> str:
+    return _puzzles()[0]
+
+
+def _puzzles() -> list[str]:
+    with open(PUZZLE_FILE, "r") as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+async def _request(port: int, line: bytes, timeout: float = 5) -> dict:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(line)
+        await writer.drain()
+        return json.loads(await asyncio.wait_for(reader.readline(), timeout))
+    finally:
+        writer.close()
+
+
+def _reset_mid_line(port: int) -> None:
+    # SO_LINGER with a zero timeout makes close() send a reset instead of a FIN.
+    with socket.create_connection(("127.0.0.1", port)) as client:
+        client.sendall(b'{"puzzle": "')
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+
+
+def _run_with_server(check, **options) -> None:
+    async def run():
+        server = SolveServer(**{"workers": 1, "max_pending": 2, **options})
+        listening = await server.start(port=0)
+        try:
+            await check(server, listening.sockets[0].getsockname()[1])
+        finally:
+            listening.close()
+            server.close()
+
+    asyncio.run(run())
+
+
+def test_overlong_lines_are_answered_and_free_their_slot():
+    async def check(server, port):
+        for _ in range(server.max_pending + 1):
+            response = await _request(port, b'{"puzzle": "' + b"." * MAX_LINE_BYTES + b'"}\n')
+            assert "longer than" in response["error"]
+        response = await _request(port, json.dumps({"puzzle": _puzzle(), "engine": "exact", "id": 1}).encode() + b"\n")
+        assert response["id"] == 1 and response["score"] == 0
+
+    _run_with_server(check)
+
+
+def test_line_after_an_overlong_one_is_answered():
+    async def check(server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"x" * 3 * MAX_LINE_BYTES + b"\n" + json.dumps({"puzzle": _puzzle(), "engine": "exact", "id": 3}).encode() + b"\n")
+        await writer.drain()
+        responses = [json.loads(await asyncio.wait_for(reader.readline(), 5)) for _ in range(2)]
+        writer.close()
+        assert "longer than" in responses[0]["error"] and responses[1]["id"] == 3
+
+    _run_with_server(check)
+
+
+def test_reset_connections_free_their_slot():
+    async def check(server, port):
+        for _ in range(server.max_pending + 1):
+            await asyncio.get_running_loop().run_in_executor(None, _reset_mid_line, port)
+        await asyncio.sleep(0.1)
+        response = await _request(port, json.dumps({"puzzle": _puzzle(), "engine": "exact", "id": 2}).encode() + b"\n")
+        assert response["id"] == 2 and response["score"] == 0
+
+    _run_with_server(check)
+
+
+def test_concurrent_vectorized_requests_are_batched():
+    params = {"max_iterations": 3, "ants_number": 10, "greedines": 0.5}
+    requests = [{"puzzle": puzzle, "engine": "vectorized", "params": params, "seed": seed, "id": seed} for seed, puzzle in enumerate(_puzzles()[:4])]
+    requests.append({"puzzle": "not-a-board", "engine": "vectorized", "params": params, "id": "bad"})
+
+    async def check(server, port):
+        responses = await asyncio.gather(*(_request(port, json.dumps(request).encode() + b"\n", timeout=30) for request in requests))
+        stats = await _request(port, b'{"op": "stats"}\n')
+        assert stats["batches"] == {"count": 1, "requests": len(requests)}
+        assert "error" in responses[-1]
+        for request, response in zip(requests, responses[:-1]):
+            expected = solve_puzzle("vectorized", request["puzzle"], params, seed=request["seed"])
+            assert response["id"] == request["id"]
+            assert (response["solution"], response["score"], response["iterations"]) == (expected["solution"], expected["score"], expected["iterations"])
+
+    _run_with_server(check, max_pending=16, batch_window_ms=200, max_batch=len(requests))
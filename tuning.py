@@ -0,0 +1,196 @@
+import math
+import random
+import statistics
+from argparse import ArgumentParser
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from tabulate import tabulate
+from bench_main import DIFFICULTIES, read_puzzles
+from engines import ACO_PARAMS, GA_PARAMS, TIME_LIMIT_PARAMS, solve_puzzle
+from hyperparams import save_profile
+
+TUNED_ENGINES = ("aco", "vectorized", "ga")
+# A (low, high) tuple is sampled uniformly, a list is a choice.
+ACO_SPACE = {
+    "ants_number": [10, 20, 50, 100],
+    "global_pher_update": (0.5, 0.95),
+    "local_pher_update": (0.05, 0.3),
+    "greedines": (0.5, 0.95),
+    "evaporation_parameter": (0.001, 0.05),
+    "max_iterations": [200, 1000],
+}
+SEARCH_SPACES = {
+    "aco": ACO_SPACE,
+    "vectorized": ACO_SPACE,
+    "ga": {
+        "pop0Size": [50, 100, 200],
+        "maxIter": [200, 500, 1000],
+        "tournamentSize": [2, 5, 10, 25, 50],
+        "crossoverProb": (0.05, 0.9),
+        "mutationProb": (0.05, 0.9),
+    },
+}
+DEFAULT_PARAMS = {"aco": ACO_PARAMS, "vectorized": ACO_PARAMS, "ga": GA_PARAMS}
+
+
+def sample_configs(engine: str, count: int, rng: random.Random) -> list[dict]:
+    """The engine's defaults and count - 1 configurations sampled from its search space."""
+    configs = [dict(DEFAULT_PARAMS[engine])]
+    for _ in range(count - 1):
+        configs.append(
+            {
+                name: rng.choice(values) if isinstance(values, list) else round(rng.uniform(*values), 4)
+                for name, values in SEARCH_SPACES[engine].items()
+            }
+        )
+    return configs
+
+
+def time_to_solution(engine: str, params: dict, puzzle: str, seed: int, time_limit_ms: float) -> float:
+    """Seconds the engine needs to solve the puzzle, infinity if it does not within time_limit_ms.
+
+    Errors, e.g. a misnamed parameter, are raised: the race drops the configuration and reports them.
+    """
+    record = solve_puzzle(engine, puzzle, {**params, TIME_LIMIT_PARAMS[engine]: time_limit_ms}, seed=seed)
+    return record["wall_time"] if record["score"] == 0 else math.inf
+
+
+def race(
+    executor: ProcessPoolExecutor,
+    engine: str,
+    configs: list[dict],
+    instances: list[tuple[str, int]],
+    eta: int = 2,
+    min_instances: int = 2,
+    time_limit_ms: float = 5000,
+    log=print,
+) -> tuple[int, list[float]]:
+    """Successive halving: returns the index of the configuration with the lowest median time-to-solution and its times.
+
+    Every round runs the surviving configurations on the first min_instances * eta ** round (puzzle, seed)
+    instances, times of earlier rounds are reused, and keeps the best 1 / eta of them. The round that
+    leaves one configuration runs on all instances. Within a round a configuration is dropped as soon as
+    more than half of its times are above the median of the configuration that already makes the cut:
+    its median can only be worse, so its jobs that did not start are cancelled. A configuration whose run
+    raises is dropped too and the error logged, RuntimeError is raised if all of them fail.
+    """
+    times: list[dict[int, float]] = [{} for _ in configs]
+    survivors = list(range(len(configs)))
+    round_number = 0
+    while True:
+        keep = max(1, len(survivors) // eta)
+        count = len(instances) if keep == 1 else min(len(instances), min_instances * eta**round_number)
+        ranked, dropped, failed = _race_round(executor, engine, configs, instances[:count], survivors, keep, times, time_limit_ms, log)
+        log(
+            f"{engine}: round {round_number}, {len(survivors)} configurations on {count} instances, "
+            f"{dropped} dropped early, {len(failed)} failed, keeping {keep}"
+        )
+        if len(failed) == len(survivors):
+            raise RuntimeError(f"Every {engine} configuration failed, see the errors above")
+        survivors = ranked[:keep]
+        if keep == 1:
+            winner = survivors[0]
+            return winner, [times[winner][instance] for instance in range(len(instances))]
+        round_number += 1
+
+
+def _median(config_times: dict[int, float], count: int) -> float:
+    return statistics.median(config_times.get(instance, math.inf) for instance in range(count))
+
+
+def _race_round(
+    executor: ProcessPoolExecutor,
+    engine: str,
+    configs: list[dict],
+    instances: list[tuple[str, int]],
+    survivors: list[int],
+    keep: int,
+    times: list[dict[int, float]],
+    time_limit_ms: float,
+    log=print,
+) -> tuple[list[int], int, set[int]]:
+    # Jobs are submitted instance by instance, so every configuration gets results at about the same pace.
+    count = len(instances)
+    futures = {}
+    for instance, (puzzle, seed) in enumerate(instances):
+        for config in survivors:
+            if instance not in times[config]:
+                future = executor.submit(time_to_solution, engine, configs[config], puzzle, seed, time_limit_ms)
+                futures[future] = (config, instance)
+    dropped = set()
+    failed = set()
+    cutoff = math.inf
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            config, instance = futures[future]
+            if future.cancelled() or config in dropped:
+                continue
+            try:
+                times[config][instance] = future.result()
+            except Exception as error:
+                log(f"{engine}: configuration {configs[config]} failed: {type(error).__name__}: {error}")
+                failed.add(config)
+                dropped.add(config)
+                for other in pending:
+                    if futures[other][0] == config:
+                        other.cancel()
+        complete = [config for config in survivors if config not in dropped and len(times[config]) >= count]
+        if len(complete) >= keep:
+            cutoff = sorted(_median(times[config], count) for config in complete)[keep - 1]
+        for config in survivors:
+            if config in dropped or len(times[config]) >= count:
+                continue
+            if 2 * sum(time > cutoff for instance, time in times[config].items() if instance < count) > count:
+                dropped.add(config)
+                for future in pending:
+                    if futures[future][0] == config:
+                        future.cancel()
+    ranked = sorted(
+        survivors,
+        key=lambda config: (config in failed, config in dropped, _median(times[config], count), -sum(math.isfinite(time) for time in times[config].values())),
+    )
+    return ranked, len(dropped - failed), failed
+
+
+def main():
+    parser = ArgumentParser(description="Race engine configurations with successive halving and save the fastest per difficulty")
+    parser.add_argument("-engines", "--engines", nargs="+", choices=TUNED_ENGINES, default=["aco", "ga"], help="Engines to tune")
+    parser.add_argument("-diff", "--difficulties", nargs="+", choices=DIFFICULTIES, default=list(DIFFICULTIES), help="Board files to tune for")
+    parser.add_argument("-configs", "--configs", type=int, default=16, help="Configurations raced per engine and difficulty, the defaults included")
+    parser.add_argument("-eta", "--eta", type=int, default=2, help="Every round keeps 1 / eta of the configurations")
+    parser.add_argument("-minInst", "--minInstances", type=int, default=2, help="(board, seed) instances of the first round")
+    parser.add_argument("-seeds", "--seeds", nargs="+", type=int, default=[0, 1], help="Seeds, every board is an instance once per seed")
+    parser.add_argument("-limit", "--limit", type=int, default=None, help="Only the first boards of every file")
+    parser.add_argument("-timeLimit", "--timeLimitMs", type=float, default=5000, help="A run not solved within this many milliseconds counts as failed")
+    parser.add_argument("-workers", "--workers", type=int, default=None, help="Runs at once, more make the timings noisier")
+    parser.add_argument("-seed", "--seed", type=int, default=0, help="Seed of the sampled configurations and the instance order")
+    parser.add_argument("-o", "--output", default="hyperparams.json", help="Profiles file, existing profiles of other engines and difficulties are kept")
+
+    args = parser.parse_args()
+    if args.eta < 2:
+        parser.error("--eta has to be at least 2")
+    rng = random.Random(args.seed)
+    summary = []
+    with ProcessPoolExecutor(args.workers) as executor:
+        for engine in args.engines:
+            for difficulty in args.difficulties:
+                instances = [(puzzle, seed) for puzzle in read_puzzles(difficulty, args.limit) for seed in args.seeds]
+                rng.shuffle(instances)
+                configs = sample_configs(engine, args.configs, rng)
+                winner, times = race(executor, engine, configs, instances, args.eta, args.minInstances, args.timeLimitMs)
+                median = statistics.median(times)
+                profile = {
+                    "params": configs[winner],
+                    "median_time": median if math.isfinite(median) else None,
+                    "success_rate": sum(math.isfinite(time) for time in times) / len(times),
+                    "instances": len(times),
+                }
+                # Saved after every race, so an interrupted run keeps the finished ones.
+                save_profile(args.output, engine, difficulty, profile)
+                summary.append({"engine": engine, "difficulty": difficulty, "default": winner == 0, **profile})
+    print(tabulate(summary, headers="keys", floatfmt=".4g"))
+
+
+if __name__ == "__main__":
+    main()